@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+
+from checkpoint import hash_inputs
+
+DEFAULT_QUOTA_BYTES = int(float(os.getenv("ARTIFACT_STORE_QUOTA_GB", "20")) * 2 ** 30)
+
+
+class ArtifactStore:
+    """
+    Content-addressed store for pipeline artifacts: LLM results, slide rasters,
+    audio clips and encoded segments.
+
+    An entry maps (kind, key) -> blob, where key is a hash of the inputs that
+    produced the artifact and the blob is stored under the sha256 of its own bytes,
+    so identical outputs from different inputs are kept once. Blobs are written to
+    a temp file and renamed into place, and the index is a SQLite database in WAL
+    mode. That makes one store safe to share between threads, processes, runs and
+    documents. When the total size goes over quota_bytes, the least recently used
+    entries are evicted.
+    """
+
+    def __init__(self, root, quota_bytes=DEFAULT_QUOTA_BYTES):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.blob_dir = os.path.join(root, "blobs")
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self.index_path = os.path.join(root, "index.sqlite")
+        with self._db() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " kind TEXT NOT NULL, key TEXT NOT NULL, blob TEXT NOT NULL, size INTEGER NOT NULL,"
+                " created REAL NOT NULL, accessed REAL NOT NULL, PRIMARY KEY (kind, key))"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+
+    @staticmethod
+    def key(*parts):
+        return hash_inputs(*parts)
+
+    @contextmanager
+    def _db(self):
+        db = sqlite3.connect(self.index_path, timeout=60, isolation_level=None)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def _blob_path(self, blob):
+        return os.path.join(self.blob_dir, blob[:2], blob)
+
+    # Lookups
+
+    def get_path(self, kind, key):
+        """
+        Path of the stored blob, or None. Marks the entry as recently used.
+        Callers must treat the file as read-only.
+        """
+        with self._db() as db:
+            row = db.execute("SELECT blob FROM entries WHERE kind = ? AND key = ?", (kind, key)).fetchone()
+            if row is None:
+                return None
+            path = self._blob_path(row[0])
+            if not os.path.exists(path):
+                db.execute("DELETE FROM entries WHERE kind = ? AND key = ?", (kind, key))
+                return None
+            db.execute("UPDATE entries SET accessed = ? WHERE kind = ? AND key = ?", (time.time(), kind, key))
+            return path
+
+    def _drop(self, kind, key):
+        with self._db() as db:
+            db.execute("DELETE FROM entries WHERE kind = ? AND key = ?", (kind, key))
+
+    def get_file(self, kind, key, dest_path, block_size=1 << 20):
+        """
+        Copy an entry to dest_path. Returns True on a hit.
+
+        The destination is always a private copy, never a link to the blob, since
+        producers write over their output paths in place (ffmpeg -y, PIL save,
+        edge-tts) and would otherwise change the stored entry for every other run.
+        The copy is checked against the blob's sha256 (its name) before it is
+        accepted; a corrupt blob is dropped from the index and counts as a miss.
+        """
+        path = self.get_path(kind, key)
+        if path is None:
+            return False
+        tmp_path = dest_path + ".tmp"
+        digest = hashlib.sha256()
+        try:
+            with open(path, "rb") as src, open(tmp_path, "wb") as dst:
+                for block in iter(lambda: src.read(block_size), b""):
+                    digest.update(block)
+                    dst.write(block)
+        except FileNotFoundError:
+            # Evicted by another process between lookup and copy
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        if digest.hexdigest() != os.path.basename(path):
+            os.remove(tmp_path)
+            self._drop(kind, key)
+            print(f"⚠️ Artifact store: {kind} entry {key[:12]} failed its checksum, dropped")
+            return False
+        os.replace(tmp_path, dest_path)
+        return True
+
+    def get_bytes(self, kind, key):
+        path = self.get_path(kind, key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if hashlib.sha256(data).hexdigest() != os.path.basename(path):
+            self._drop(kind, key)
+            return None
+        return data
+
+    def get_json(self, kind, key):
+        data = self.get_bytes(kind, key)
+        return None if data is None else json.loads(data.decode("utf-8"))
+
+    # Writes
+
+    def _store_blob(self, write):
+        fd, tmp_path = tempfile.mkstemp(dir=self.blob_dir, suffix=".tmp")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for block in write():
+                    digest.update(block)
+                    f.write(block)
+                    size += len(block)
+            blob = digest.hexdigest()
+            path = self._blob_path(blob)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return blob, size
+
+    def _index(self, kind, key, blob, size):
+        now = time.time()
+        with self._db() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO entries (kind, key, blob, size, created, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, key, blob, size, now, now)
+            )
+        if self.quota_bytes and self.total_bytes() > self.quota_bytes:
+            self.gc()
+        return self._blob_path(blob)
+
+    def put_file(self, kind, key, src_path, block_size=1 << 20):
+        def blocks():
+            with open(src_path, "rb") as f:
+                yield from iter(lambda: f.read(block_size), b"")
+        return self._index(kind, key, *self._store_blob(blocks))
+
+    def put_bytes(self, kind, key, data):
+        return self._index(kind, key, *self._store_blob(lambda: [data]))
+
+    def put_json(self, kind, key, value):
+        return self.put_bytes(kind, key, json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+    # Garbage collection
+
+    def total_bytes(self):
+        """
+        Size of all distinct blobs referenced by the index.
+        """
+        with self._db() as db:
+            return db.execute("SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT blob, size FROM entries)").fetchone()[0]
+
+    def gc(self, quota_bytes=None):
+        """
+        Evict least-recently-used entries until the store fits in the quota, and
+        delete blobs no entry references any more. Returns bytes freed.
+        """
+        quota_bytes = self.quota_bytes if quota_bytes is None else quota_bytes
+        total = self.total_bytes()
+        with self._db() as db:
+            db.execute("BEGIN IMMEDIATE")
+            rows = db.execute("SELECT kind, key, blob, size FROM entries ORDER BY accessed").fetchall()
+            evicted_blobs = set()
+            for kind, key, blob, size in rows:
+                if total <= quota_bytes:
+                    break
+                db.execute("DELETE FROM entries WHERE kind = ? AND key = ?", (kind, key))
+                if db.execute("SELECT 1 FROM entries WHERE blob = ? LIMIT 1", (blob,)).fetchone() is None:
+                    evicted_blobs.add(blob)
+                    total -= size
+            db.execute("COMMIT")
+
+        freed = 0
+        for blob in evicted_blobs:
+            path = self._blob_path(blob)
+            try:
+                freed += os.path.getsize(path)
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        if freed:
+            print(f"🧹 Artifact store: evicted {len(evicted_blobs)} blobs ({freed / 2 ** 20:.1f} MB)")
+        return freed
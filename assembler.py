@@ -0,0 +1,521 @@
+import json
+import os
+import re
+import subprocess
+
+from checkpoint import hash_file, hash_inputs
+from workers import default_governor
+
+# Every segment is encoded with identical stream parameters, which is what lets
+# the concat demuxer join them with stream copy instead of a re-encode.
+VIDEO_ARGS = ["-c:v", "libx264", "-preset", "medium", "-tune", "stillimage", "-pix_fmt", "yuv420p"]
+AUDIO_ARGS = ["-c:a", "aac", "-b:a", "192k", "-ar", "44100", "-ac", "2"]
+
+
+def ffmpeg_binary():
+    """
+    The ffmpeg moviepy is configured with (imageio-ffmpeg's bundled build by default).
+    """
+    binary = os.getenv("FFMPEG_BINARY")
+    if binary and binary != "ffmpeg-imageio":
+        return binary
+    import imageio_ffmpeg
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+def run_ffmpeg(command, kind="audio", **kwargs):
+    """
+    subprocess.run under the resource governor's lease for a TASK_COSTS kind.
+    """
+    with default_governor().acquire(kind):
+        return subprocess.run(command, **kwargs)
+
+def probe_duration(path):
+    """
+    Media duration in seconds, read from ffmpeg's stream header without decoding.
+    """
+    completed = run_ffmpeg([ffmpeg_binary(), "-hide_banner", "-i", path], "probe", capture_output=True, text=True)
+    match = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", completed.stderr)
+    if not match:
+        raise RuntimeError(f"Could not read duration of {path}")
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+def encode_still_segment(image_path, audio_path, output_path, fps=24, presenter_video_path=None, duration=None,
+                         subtitles_path=None):
+    """
+    Encode one slide (still image + narration) straight to an mp4 with ffmpeg.
+
+    The image and audio are only open inside the ffmpeg process for the length of
+    this call, and no frames pass through Python, so memory and file handles do not
+    depend on how many segments came before. An optional presenter video is scaled
+    to half the slide height and overlaid in the bottom-right corner. Captions
+    from an optional SRT file are burned in by the same encode.
+    """
+    duration = duration or probe_duration(audio_path)
+    captions = f",subtitles={_filter_path(subtitles_path)}" if subtitles_path else ""
+    command = [ffmpeg_binary(), "-y", "-loglevel", "error",
+               "-loop", "1", "-framerate", str(fps), "-i", image_path,
+               "-i", audio_path]
+    if presenter_video_path:
+        from PIL import Image
+
+        with Image.open(image_path) as image:
+            height = image.height // 2
+        command += ["-i", presenter_video_path,
+                    "-filter_complex",
+                    f"[0:v]scale=trunc(iw/2)*2:trunc(ih/2)*2[bg];[2:v]scale=-2:{height}[p];"
+                    f"[bg][p]overlay=W-w:H-h:eof_action=pass{captions}[v]",
+                    "-map", "[v]", "-map", "1:a"]
+    else:
+        command += ["-vf", f"scale=trunc(iw/2)*2:trunc(ih/2)*2{captions}", "-map", "0:v", "-map", "1:a"]
+    # Written next to the output and renamed over it, so an existing file at
+    # output_path (possibly shared with another run) is replaced, never rewritten
+    tmp_path = output_path + ".tmp.mp4"
+    command += VIDEO_ARGS + ["-r", str(fps)] + AUDIO_ARGS + ["-t", f"{duration:.3f}", "-movflags", "+faststart", tmp_path]
+    run_ffmpeg(command, "encode", check=True)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+def _filter_path(path):
+    # A file name as a filter option: ':' escaped for the option parser, the whole
+    # value quoted for the filtergraph parser (e.g. 'C\:/runs/x/segment.srt')
+    return "'" + os.path.abspath(path).replace("\\", "/").replace(":", "\\:") + "'"
+
+def concat_segments(segment_paths, output_path):
+    """
+    Join encoded segments with ffmpeg's concat demuxer, copying streams.
+    """
+    list_path = output_path + ".txt"
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in segment_paths:
+            f.write(f"file '{os.path.abspath(path)}'\n")
+    try:
+        run_ffmpeg([
+            ffmpeg_binary(), "-y", "-loglevel", "error",
+            "-f", "concat", "-safe", "0", "-i", list_path,
+            "-c", "copy", "-movflags", "+faststart", output_path
+        ], check=True)
+    finally:
+        os.remove(list_path)
+    return output_path
+
+def fit_audio(audio_path, duration, output_path):
+    """
+    Fit a narration clip to exactly `duration` seconds: speed it up with atempo
+    when it is longer, pad it with silence when it is shorter. Written as PCM WAV
+    so the fitted clips can be concatenated sample-exactly.
+    """
+    tempo = probe_duration(audio_path) / duration
+    filters = []
+    while tempo > 2.0:
+        # Older ffmpeg builds cap atempo at 2.0 per instance
+        filters.append("atempo=2.0")
+        tempo /= 2.0
+    if tempo > 1.0:
+        filters.append(f"atempo={tempo:.6f}")
+    filters.append(f"apad=whole_dur={duration:.3f}")
+    run_ffmpeg([
+        ffmpeg_binary(), "-y", "-loglevel", "error", "-i", audio_path,
+        "-af", ",".join(filters), "-t", f"{duration:.3f}",
+        "-c:a", "pcm_s16le", "-ar", "44100", "-ac", "2", output_path
+    ], check=True)
+    return output_path
+
+def build_audio_track(audio_paths, durations, output_path, work_dir):
+    """
+    One continuous narration track whose clip boundaries line up with the
+    segments of an already-encoded video: each clip is fitted to its segment's
+    duration, then the clips are joined and encoded once with AUDIO_ARGS.
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    fitted = [fit_audio(path, duration, os.path.join(work_dir, f"fit_{i:04d}.wav"))
+              for i, (path, duration) in enumerate(zip(audio_paths, durations))]
+    list_path = output_path + ".txt"
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in fitted:
+            f.write(f"file '{os.path.abspath(path)}'\n")
+    try:
+        run_ffmpeg([
+            ffmpeg_binary(), "-y", "-loglevel", "error",
+            "-f", "concat", "-safe", "0", "-i", list_path
+        ] + AUDIO_ARGS + [output_path], check=True)
+    finally:
+        os.remove(list_path)
+        for path in fitted:
+            os.remove(path)
+    return output_path
+
+def mux_audio_tracks(video_path, tracks, output_path, original_language=None):
+    """
+    Copy the video stream and add one audio stream per (audio_path, iso639_2)
+    track, without re-encoding anything. With original_language set, the video's
+    own narration is kept as the first (default) audio stream and tagged with it;
+    otherwise it is dropped.
+    """
+    command = [ffmpeg_binary(), "-y", "-loglevel", "error", "-i", video_path]
+    for audio_path, _ in tracks:
+        command += ["-i", audio_path]
+    command += ["-map", "0:v"]
+    languages = [language for _, language in tracks]
+    if original_language:
+        command += ["-map", "0:a"]
+        languages.insert(0, original_language)
+    for i in range(len(tracks)):
+        command += ["-map", f"{i + 1}:a"]
+    for i, language in enumerate(languages):
+        command += [f"-metadata:s:a:{i}", f"language={language}", f"-disposition:a:{i}", "default" if i == 0 else "0"]
+    command += ["-c", "copy", "-movflags", "+faststart", output_path]
+    run_ffmpeg(command, check=True)
+    return output_path
+
+
+def segment_input_hash(image_path, audio_path, presenter_video_path=None, fps=24, duration=None, subtitles_path=None):
+    """
+    Hash of everything that determines a segment's bytes: its inputs and the
+    encoder settings.
+    """
+    return hash_inputs(
+        hash_file(image_path), hash_file(audio_path),
+        hash_file(presenter_video_path) if presenter_video_path else None,
+        fps, VIDEO_ARGS, AUDIO_ARGS, round(duration, 3) if duration else None,
+        *([hash_file(subtitles_path)] if subtitles_path else [])
+    )
+
+
+class EditDecisionList:
+    """
+    The final video as an ordered list of segments, saved as JSON:
+
+        {"output": ..., "segments": [{"index", "image", "audio", "presenter",
+          "fps", "duration", "subtitles", "script", "words", "audio_sha256", "input_hash", "segment",
+          "segment_sha256", "start"}],
+         "transitions": [{"after", "kind", "seconds", "image_from", "image_to", "fps",
+          "duration", "input_hash", "segment", "segment_sha256", "start"}],
+         "audio_tracks": {"mode", "original_language", "tracks": [{"code", "language",
+          "track", "clips", "durations"}]} or null}
+
+    Each segment is a separate encode, so every boundary starts on a keyframe and
+    the container can be rebuilt by stream copy. Transitions are segments of their
+    own, played after the segment with index `after`. On a re-render only the
+    entries whose input_hash changed (or whose segment file is gone) are re-encoded.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.output = None
+        self.segments = []
+        self.transitions = []
+        self.audio_tracks = None
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.output = data.get("output")
+            self.segments = data.get("segments", [])
+            self.transitions = data.get("transitions", [])
+            self.audio_tracks = data.get("audio_tracks")
+
+    def entry(self, index):
+        return self.segments[index] if index < len(self.segments) else None
+
+    def transition(self, after):
+        return next((entry for entry in self.transitions if entry["after"] == after), None)
+
+    @staticmethod
+    def _current(entry, input_hash, segment_path):
+        return bool(entry and entry["input_hash"] == input_hash and entry["segment"] == os.path.abspath(segment_path)
+                    and os.path.exists(segment_path) and hash_file(segment_path) == entry["segment_sha256"])
+
+    def is_current(self, index, input_hash, segment_path):
+        """
+        True when the recorded segment at index was encoded from these inputs and
+        its file is still intact.
+        """
+        return self._current(self.entry(index), input_hash, segment_path)
+
+    def is_transition_current(self, after, input_hash, segment_path):
+        return self._current(self.transition(after), input_hash, segment_path)
+
+    def record(self, index, image_path, audio_path, segment_path, input_hash, presenter_video_path=None, fps=24,
+               duration=None, subtitles_path=None, script=None, words_path=None):
+        entry = {
+            "index": index,
+            "image": os.path.abspath(image_path),
+            "audio": os.path.abspath(audio_path),
+            "presenter": os.path.abspath(presenter_video_path) if presenter_video_path else None,
+            "fps": fps,
+            "duration": duration,
+            "subtitles": os.path.abspath(subtitles_path) if subtitles_path else None,
+            # Narration text and word timings, for rebuilding captions after an edit
+            "script": script,
+            "words": os.path.abspath(words_path) if words_path else None,
+            "audio_sha256": hash_file(audio_path),
+            "input_hash": input_hash,
+            "segment": os.path.abspath(segment_path),
+            "segment_sha256": hash_file(segment_path),
+        }
+        if index < len(self.segments):
+            self.segments[index] = entry
+        else:
+            self.segments.append(entry)
+
+    def record_transition(self, after, image_from, image_to, kind, seconds, segment_path, input_hash, fps=24):
+        entry = {
+            "after": after,
+            "kind": kind,
+            "seconds": seconds,
+            "image_from": os.path.abspath(image_from),
+            "image_to": os.path.abspath(image_to),
+            "fps": fps,
+            "duration": None,
+            "input_hash": input_hash,
+            "segment": os.path.abspath(segment_path),
+            "segment_sha256": hash_file(segment_path),
+        }
+        self.transitions = sorted([t for t in self.transitions if t["after"] != after] + [entry],
+                                  key=lambda t: t["after"])
+
+    def record_audio_tracks(self, mode, tracks, original_language=None):
+        """
+        Extra narration languages muxed into the video ("streams") or written
+        next to it as final_video.<code>.mp4 ("files"). Each track lists the clips
+        it was fitted from and the slot durations it was fitted to.
+        """
+        self.audio_tracks = {
+            "mode": mode,
+            "original_language": original_language,
+            "tracks": [{**track, "track": os.path.abspath(track["track"]),
+                        "clips": [os.path.abspath(path) for path in track["clips"]]} for track in tracks],
+        }
+
+    def prune_transitions(self, keep):
+        """
+        Drop the transitions whose `after` index is not in keep.
+        """
+        self.transitions = [entry for entry in self.transitions if entry["after"] in keep]
+
+    def timeline(self):
+        """
+        Segment and transition entries in playback order.
+        """
+        transitions = {entry["after"]: entry for entry in self.transitions}
+        ordered = []
+        for entry in self.segments:
+            ordered.append(entry)
+            if entry["index"] in transitions:
+                ordered.append(transitions[entry["index"]])
+        return ordered
+
+    def paths(self):
+        return [entry["segment"] for entry in self.timeline()]
+
+    def slot_durations(self):
+        """
+        Per segment, its duration plus that of the transition after it: the time
+        each narration clip owns in the final video.
+        """
+        transitions = {entry["after"]: entry["duration"] or 0.0 for entry in self.transitions}
+        return [entry["duration"] + transitions.get(entry["index"], 0.0) for entry in self.segments]
+
+    def save(self, output_path=None, count=None):
+        """
+        Write the list, truncated to `count` segments, with each segment's and
+        transition's start time.
+        """
+        if count is not None:
+            del self.segments[count:]
+            self.transitions = [entry for entry in self.transitions if entry["after"] < count - 1]
+        start = 0.0
+        for entry in self.timeline():
+            entry["duration"] = entry["duration"] or probe_duration(entry["segment"])
+            entry["start"] = round(start, 3)
+            start += entry["duration"]
+        self.output = os.path.abspath(output_path) if output_path else self.output
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"output": self.output, "segments": self.segments, "transitions": self.transitions,
+                       "audio_tracks": self.audio_tracks}, f, indent=4)
+        os.replace(tmp_path, self.path)
+        return self.path
+
+def _unlink(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def _refresh_captions(entry):
+    """
+    Word timings (and the burn-in SRT, if any) for a segment whose audio was
+    replaced, estimated over the new audio since it has no word events.
+    """
+    from subtitles import estimate_word_timings, build_cues, write_srt
+
+    duration = probe_duration(entry["audio"])
+    words = estimate_word_timings(entry["script"], duration)
+    if entry.get("words"):
+        with open(entry["words"], "w", encoding="utf-8") as f:
+            json.dump(words, f, ensure_ascii=False)
+    if entry.get("subtitles"):
+        write_srt(build_cues(words, end=duration), entry["subtitles"])
+
+def write_caption_sidecars(edl, output_path):
+    """
+    <video>.srt/.vtt from each segment's word timings, placed at the segment's
+    start in the saved list (which already accounts for transitions).
+    """
+    from subtitles import load_word_timings, build_cues, shift_cues, write_sidecars
+
+    cues = []
+    for entry in edl.segments:
+        if entry.get("script") is None:
+            continue
+        words = load_word_timings(entry.get("words"), entry["script"], entry["duration"])
+        cues += shift_cues(build_cues(words, end=entry["duration"]), entry["start"])
+    return write_sidecars(cues, output_path)
+
+def remux_audio_tracks(edl, output_path):
+    """
+    Put the extra narration languages back on a rebuilt video. A track whose
+    slots changed length (replaced audio) is refitted from its clips first.
+    """
+    durations = edl.slot_durations()
+    for track in edl.audio_tracks["tracks"]:
+        if [round(d, 3) for d in track["durations"]] != [round(d, 3) for d in durations]:
+            build_audio_track(track["clips"], durations, track["track"],
+                              os.path.join(os.path.dirname(track["track"]), "fit"))
+            track["durations"] = durations
+    tracks = [(track["track"], track["language"]) for track in edl.audio_tracks["tracks"]]
+    if edl.audio_tracks["mode"] == "files":
+        base, _ = os.path.splitext(output_path)
+        for track, entry in zip(tracks, edl.audio_tracks["tracks"]):
+            mux_audio_tracks(output_path, [track], f"{base}.{entry['code']}.mp4")
+    else:
+        muxed_path = output_path + ".multi.mp4"
+        mux_audio_tracks(output_path, tracks, muxed_path, original_language=edl.audio_tracks["original_language"])
+        os.replace(muxed_path, output_path)
+    edl.save()
+
+def rerender(edl_path, output_path=None):
+    """
+    Rebuild a video from its edit-decision list after some of its images or audio
+    files were replaced: re-encode only the segments whose inputs differ from what
+    was recorded, then stream-copy everything into a new container. Stale segment
+    files are unlinked before they are re-encoded rather than written over. Extra
+    narration languages recorded in the list are muxed back in.
+    """
+    from transitions import encode_transition, transition_input_hash
+
+    edl = EditDecisionList(edl_path)
+    output_path = output_path or edl.output
+    reencoded = 0
+    for entry in edl.segments:
+        subtitles = entry.get("subtitles")
+        if entry.get("script") is not None and hash_file(entry["audio"]) != entry.get("audio_sha256"):
+            # Replaced narration: its recorded word timings belong to the old audio
+            _refresh_captions(entry)
+        input_hash = segment_input_hash(entry["image"], entry["audio"], entry["presenter"], entry["fps"],
+                                        subtitles_path=subtitles)
+        if not edl.is_current(entry["index"], input_hash, entry["segment"]):
+            _unlink(entry["segment"])
+            duration = probe_duration(entry["audio"])
+            encode_still_segment(entry["image"], entry["audio"], entry["segment"], fps=entry["fps"],
+                                 presenter_video_path=entry["presenter"], duration=duration, subtitles_path=subtitles)
+            edl.record(entry["index"], entry["image"], entry["audio"], entry["segment"], input_hash,
+                       presenter_video_path=entry["presenter"], fps=entry["fps"], duration=duration,
+                       subtitles_path=subtitles, script=entry.get("script"), words_path=entry.get("words"))
+            reencoded += 1
+    for entry in edl.transitions:
+        # A transition blends its two slide rasters, so it follows edits to either
+        input_hash = transition_input_hash(entry["image_from"], entry["image_to"], entry["kind"], entry["seconds"],
+                                           entry["fps"])
+        if not edl.is_transition_current(entry["after"], input_hash, entry["segment"]):
+            _unlink(entry["segment"])
+            encode_transition(entry["image_from"], entry["image_to"], entry["segment"], entry["kind"],
+                              entry["seconds"], entry["fps"])
+            edl.record_transition(entry["after"], entry["image_from"], entry["image_to"], entry["kind"],
+                                  entry["seconds"], entry["segment"], input_hash, fps=entry["fps"])
+            reencoded += 1
+    edl.save(output_path)
+    concat_segments(edl.paths(), output_path)
+    if edl.audio_tracks:
+        remux_audio_tracks(edl, output_path)
+    if any(entry.get("script") is not None for entry in edl.segments):
+        write_caption_sidecars(edl, output_path)
+    print(f"✅ Re-rendered {output_path}: {reencoded} of {len(edl.paths())} segments re-encoded")
+    return output_path
+
+
+class StreamingAssembler:
+    """
+    Builds the final video one segment at a time.
+
+        with StreamingAssembler(work_dir) as assembler:
+            for image, audio in slides:
+                assembler.add(image, audio)
+            assembler.finish("Output/final_video.mp4")
+
+    Each add() encodes its segment immediately and keeps only the segment's path,
+    so nothing about earlier slides stays open while later ones are written.
+    Segment files are removed on exit unless keep_segments is set.
+
+    With an edl_path, segments are kept in work_dir together with an
+    EditDecisionList; the next build with the same work_dir re-encodes only the
+    segments whose image or audio changed.
+    """
+
+    def __init__(self, work_dir, fps=24, keep_segments=False, edl_path=None):
+        self.work_dir = work_dir
+        self.fps = fps
+        self.keep_segments = keep_segments or edl_path is not None
+        self.edl = EditDecisionList(edl_path) if edl_path else None
+        self.segment_paths = []
+        self.reused = 0
+        os.makedirs(work_dir, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.keep_segments:
+            for path in self.segment_paths:
+                if os.path.exists(path):
+                    os.remove(path)
+        return False
+
+    def add(self, image_path, audio_path, presenter_video_path=None):
+        index = len(self.segment_paths)
+        segment_path = os.path.join(self.work_dir, f"segment_{index:04d}.mp4")
+        if self.edl is None:
+            encode_still_segment(image_path, audio_path, segment_path, fps=self.fps, presenter_video_path=presenter_video_path)
+        else:
+            input_hash = segment_input_hash(image_path, audio_path, presenter_video_path, self.fps)
+            if self.edl.is_current(index, input_hash, segment_path):
+                self.reused += 1
+            else:
+                duration = probe_duration(audio_path)
+                encode_still_segment(image_path, audio_path, segment_path, fps=self.fps,
+                                     presenter_video_path=presenter_video_path, duration=duration)
+                self.edl.record(index, image_path, audio_path, segment_path, input_hash,
+                                presenter_video_path=presenter_video_path, fps=self.fps, duration=duration)
+        self.segment_paths.append(segment_path)
+        return segment_path
+
+    def finish(self, output_path):
+        concat_segments(self.segment_paths, output_path)
+        if self.edl is not None:
+            self.edl.save(output_path, count=len(self.segment_paths))
+            print(f"⏩ Reused {self.reused} of {len(self.segment_paths)} segments from the edit-decision list.")
+        return output_path
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Re-render a video from its edit-decision list.")
+    parser.add_argument("edl", help="edl.json written next to the segments")
+    parser.add_argument("--output", help="Defaults to the video the list was written for")
+    args = parser.parse_args()
+    rerender(args.edl, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
-import asyncio
-import edge_tts
+from tracing import span, file_size
 
 def generate_audio(script, output_file, voice="en-GB-RyanNeural", rate="+20%"):
     """
@@ -10,9 +9,33 @@ def generate_audio(script, output_file, voice="en-GB-RyanNeural", rate="+20%"):
     output_file: Output filename (default: output.mp3)
     voice: Voice selection (default: en-GB-RyanNeural - deep male voice)
     rate: Speaking rate adjustment (default: +30% faster)
+
+    Returns the spoken words with their timings, [{"text", "start", "end"}] in
+    seconds, taken from the WordBoundary events edge-tts sends in the same stream
+    as the audio. The list is empty if the service sent none.
     """
+    import asyncio
+    import edge_tts
+
     async def _generate():
-        communicate = edge_tts.Communicate(script, voice, rate=rate)
-        await communicate.save(output_file)
-    
-    asyncio.run(_generate())
+        try:
+            communicate = edge_tts.Communicate(script, voice, rate=rate, boundary="WordBoundary")
+        except TypeError:
+            # edge-tts before 7.0 has no boundary option and always sends WordBoundary events
+            communicate = edge_tts.Communicate(script, voice, rate=rate)
+        words = []
+        with open(output_file, "wb") as f:
+            async for chunk in communicate.stream():
+                if chunk["type"] == "audio":
+                    f.write(chunk["data"])
+                elif chunk["type"] == "WordBoundary":
+                    # Offsets and durations are in 100-nanosecond ticks
+                    start = chunk["offset"] / 1e7
+                    words.append({"text": chunk["text"], "start": round(start, 3),
+                                  "end": round(start + chunk["duration"] / 1e7, 3)})
+        return words
+
+    with span("tts.clip", voice=voice, chars=len(script), bytes_in=len(script.encode("utf-8"))) as clip_span:
+        words = asyncio.run(_generate())
+        clip_span.set(bytes_out=file_size(output_file), words=len(words))
+    return words
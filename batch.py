@@ -0,0 +1,138 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from artifact_store import ArtifactStore
+from workers import StageLimits, SofficePool, default_governor
+
+
+def collect_pdfs(source):
+    """
+    Resolve the batch input into a list of PDF paths.
+
+    source can be a directory (searched recursively for *.pdf), a .json manifest
+    holding a list of paths, or a text manifest with one path per line.
+    Relative manifest entries are resolved against the manifest's directory.
+    """
+    if os.path.isdir(source):
+        pdfs = []
+        for root, _, files in os.walk(source):
+            pdfs.extend(os.path.join(root, name) for name in files if name.lower().endswith(".pdf"))
+        return sorted(pdfs)
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    with open(source, encoding="utf-8") as f:
+        if source.endswith(".json"):
+            entries = json.load(f)
+        else:
+            entries = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return [entry if os.path.isabs(entry) else os.path.join(base_dir, entry) for entry in entries]
+
+def document_output_dir(output_root, pdf_path):
+    """
+    <output_root>/<pdf name>-<hash of its absolute path>: PDFs with the same name
+    in different folders (or manifests) must not share a directory and checkpoint.
+    """
+    name = os.path.splitext(os.path.basename(pdf_path))[0]
+    digest = hashlib.sha256(os.path.abspath(pdf_path).encode("utf-8")).hexdigest()[:8]
+    return os.path.join(output_root, f"{name}-{digest}")
+
+def process_document(pdf_path, output_root, config, limits, store, resume):
+    from main_version_4 import run_pipeline
+
+    started = time.time()
+    status = {"pdf": pdf_path, "output_dir": document_output_dir(output_root, pdf_path)}
+    try:
+        status["video"] = run_pipeline(
+            pdf_path, config,
+            output_dir=status["output_dir"],
+            resume=resume,
+            limits=limits,
+            store=store
+        )
+        status["status"] = "completed"
+    except Exception as e:
+        status["status"] = "failed"
+        status["error"] = f"{type(e).__name__}: {e}"
+        status["traceback"] = traceback.format_exc()
+    status["seconds"] = round(time.time() - started, 2)
+    return status
+
+def write_report(report_path, statuses):
+    tmp_path = report_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(statuses, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, report_path)
+
+def run_batch(pdfs, output_root, config, workers=4, llm=4, tts=8, render=None, resume=False, llm_light=8):
+    """
+    Convert many PDFs with a pool of document workers.
+
+    Every document shares one StageLimits (so LLM, TTS and CPU-bound rendering are
+    bounded across the whole batch, not per document), the machine-wide resource
+    governor, one pool of LibreOffice profiles and one artifact store. The status report is rewritten as each
+    document finishes, so it is useful while the batch is still running.
+    """
+    render = render or os.cpu_count() or 1
+    os.makedirs(output_root, exist_ok=True)
+    limits = StageLimits(llm=llm, tts=tts, render=render, soffice_pool=SofficePool(render), governor=default_governor(),
+                         llm_light=llm_light)
+    store = ArtifactStore(os.getenv("ARTIFACT_STORE_DIR", os.path.join(output_root, "store")))
+    report_path = os.path.join(output_root, "batch_report.json")
+
+    statuses = {pdf: {"pdf": pdf, "status": "queued"} for pdf in pdfs}
+    write_report(report_path, list(statuses.values()))
+
+    with limits.soffice_pool, ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(process_document, pdf, output_root, config, limits, store, resume): pdf
+            for pdf in pdfs
+        }
+        for future in as_completed(futures):
+            status = future.result()
+            statuses[futures[future]] = status
+            write_report(report_path, list(statuses.values()))
+            icon = "✅" if status["status"] == "completed" else "❌"
+            print(f"{icon} {status['pdf']} ({status['status']}, {status['seconds']}s)")
+
+    failed = sum(1 for status in statuses.values() if status["status"] != "completed")
+    print(f"✅ Batch finished: {len(pdfs) - failed} completed, {failed} failed. Report: {report_path}")
+    return list(statuses.values())
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a directory or manifest of PDFs into videos.")
+    parser.add_argument("source", help="Directory of PDFs, or a manifest (.txt with one path per line, or .json list)")
+    parser.add_argument("--output", default="Output/batch", help="Root directory for per-document outputs")
+    parser.add_argument("--workers", type=int, default=4, help="Documents processed at the same time")
+    parser.add_argument("--llm-concurrency", type=int, default=4)
+    parser.add_argument("--llm-light-concurrency", type=int, default=8,
+                        help="Concurrent summary, translation and repair calls (separate from slide generation)")
+    parser.add_argument("--tts-concurrency", type=int, default=8)
+    parser.add_argument("--render-concurrency", type=int, default=None, help="Defaults to the CPU count")
+    parser.add_argument("--theme", default="creative")
+    parser.add_argument("--voice", default="enthusiastic")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--resume", action="store_true", help="Reuse checkpoints from earlier runs")
+    args = parser.parse_args()
+
+    from main_version_4 import VideoConfig
+
+    config = VideoConfig(theme=args.theme, language=args.language, voice_style=args.voice)
+    pdfs = collect_pdfs(args.source)
+    print(f"Found {len(pdfs)} PDFs to convert")
+    run_batch(
+        pdfs, args.output, config,
+        workers=args.workers,
+        llm=args.llm_concurrency,
+        llm_light=args.llm_light_concurrency,
+        tts=args.tts_concurrency,
+        render=args.render_concurrency,
+        resume=args.resume
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Hermetic end-to-end benchmarks: synthetic PDFs, a latency-injected stub LLM and a
+fixed-length stub TTS, so pipeline throughput can be measured offline.
+
+    python -m benchmarks.run_benchmarks --pages 10 100
+    python -m benchmarks.run_benchmarks --pages 10 --save-baseline
+    python -m benchmarks.run_benchmarks --pages 10 --compare benchmarks/baselines/<commit>.json
+
+Each size runs in its own subprocess so peak RSS is measured per run.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+
+# (span name, unit) pairs reported as throughput
+STAGES = [
+    ("extract", "pages"),
+    ("llm.chunk", "chunks"),
+    ("slides.pptx", "slides"),
+    ("slides.rasterize", "slides"),
+    ("tts.clip", "clips"),
+    ("encode.segment", "segments"),
+    ("final.concat", "segments"),
+]
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def measure_startup(repeats=5):
+    """
+    Cold-start cost of the CLI: wall time of `cli.py --help` and the cumulative
+    import time of the pipeline module (from -X importtime), median of `repeats`.
+    """
+    help_ms, import_ms = [], []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "cli.py", "--help"], capture_output=True, check=True)
+        help_ms.append((time.perf_counter() - started) * 1000)
+        completed = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main_version_4"],
+                                   capture_output=True, text=True, check=True)
+        last = [line for line in completed.stderr.splitlines() if line.rstrip().endswith("| main_version_4")][-1]
+        import_ms.append(int(last.split("|")[1]) / 1000)
+    return {"cli_help_ms": round(sorted(help_ms)[repeats // 2], 1), "import_pipeline_ms": round(sorted(import_ms)[repeats // 2], 1)}
+
+def run_single(pages, workdir, llm_latency, tts_latency, clip_seconds):
+    """
+    Run the pipeline once on a synthetic PDF with stubbed services (in-process).
+    """
+    from benchmarks.stubs import StubLLMClient, make_stub_tts, stub_slides_to_images, soffice_available
+    from benchmarks.synthetic_pdf import synthetic_pdf
+    from tracing import peak_rss_bytes
+    from artifact_store import ArtifactStore
+    os.environ.setdefault("TOKEN", "benchmark")
+    import audio
+    import main_version_4
+
+    pdf_path = synthetic_pdf(pages)
+    main_version_4.client = StubLLMClient(latency=llm_latency)
+    stub_tts = make_stub_tts(clip_seconds=clip_seconds, latency=tts_latency)
+    main_version_4.generate_audio = stub_tts
+    audio.generate_audio = stub_tts
+    real_render = soffice_available()
+    if not real_render:
+        main_version_4.slides_to_images = stub_slides_to_images
+
+    output_dir = os.path.join(workdir, f"{pages}p")
+    shutil.rmtree(output_dir, ignore_errors=True)
+    started = time.perf_counter()
+    # A fresh store per run, so results are never served from an earlier benchmark
+    store = ArtifactStore(os.path.join(output_dir, "store"))
+    main_version_4.run_pipeline(pdf_path, output_dir=output_dir, store=store)
+    elapsed = time.perf_counter() - started
+
+    trace_path = next(
+        os.path.join(root, name)
+        for root, _, files in os.walk(os.path.join(output_dir, "runs")) for name in files if name == "trace.jsonl"
+    )
+    with open(trace_path, encoding="utf-8") as f:
+        spans = [json.loads(line) for line in f]
+
+    stages = {}
+    for name, unit in STAGES:
+        matching = [item for item in spans if item["name"] == name]
+        if not matching:
+            continue
+        wall = sum(item["wall_s"] for item in matching)
+        count = pages if unit == "pages" else len(matching)
+        if name in ("slides.pptx", "slides.rasterize", "final.concat"):
+            count = sum(1 for item in spans if item["name"] == "encode.segment")
+        stages[name] = {"wall_s": round(wall, 4), unit: count, f"{unit}_per_s": round(count / wall, 2) if wall else None}
+
+    return {
+        "pages": pages,
+        "end_to_end_s": round(elapsed, 3),
+        "pages_per_s": round(pages / elapsed, 3),
+        "peak_rss_mb": round(peak_rss_bytes() / 2 ** 20, 1),
+        "real_render": real_render,
+        "stages": stages,
+    }
+
+def run_suite(page_counts, workdir, llm_latency, tts_latency, clip_seconds):
+    startup = measure_startup()
+    print(f"✅ Startup: cli --help {startup['cli_help_ms']} ms, pipeline import {startup['import_pipeline_ms']} ms")
+    results = []
+    for pages in page_counts:
+        print(f"Benchmarking {pages}-page PDF...")
+        command = [
+            sys.executable, "-m", "benchmarks.run_benchmarks", "--single", str(pages),
+            "--workdir", workdir, "--llm-latency", str(llm_latency),
+            "--tts-latency", str(tts_latency), "--clip-seconds", str(clip_seconds),
+        ]
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(completed.stderr)
+            raise RuntimeError(f"Benchmark for {pages} pages failed")
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+        print(f"✅ {pages} pages: {results[-1]['end_to_end_s']}s, peak {results[-1]['peak_rss_mb']} MB")
+    return {
+        "commit": git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "settings": {"llm_latency": llm_latency, "tts_latency": tts_latency, "clip_seconds": clip_seconds},
+        "startup": startup,
+        "results": results,
+    }
+
+def compare(report, baseline, tolerance=0.10):
+    """
+    Print the change against a baseline; returns the list of regressions beyond tolerance.
+    """
+    regressions = []
+    baseline_by_pages = {result["pages"]: result for result in baseline["results"]}
+    print(f"\nComparing {report['commit']} against baseline {baseline['commit']} (tolerance {tolerance:.0%})")
+    print(f"{'metric':<40}{'baseline':>12}{'current':>12}{'change':>10}")
+    rows = [("startup", [(name, value, baseline["startup"][name])
+                         for name, value in report.get("startup", {}).items() if name in baseline.get("startup", {})])]
+    for result in report["results"]:
+        base = baseline_by_pages.get(result["pages"])
+        if not base:
+            continue
+        metrics = [("end_to_end_s", result["end_to_end_s"], base["end_to_end_s"]),
+                   ("peak_rss_mb", result["peak_rss_mb"], base["peak_rss_mb"])]
+        metrics += [(f"{stage}.wall_s", values["wall_s"], base["stages"][stage]["wall_s"])
+                    for stage, values in result["stages"].items() if stage in base["stages"]]
+        rows.append((f"{result['pages']}p", metrics))
+    for label, metrics in rows:
+        for name, current, previous in metrics:
+            change = (current - previous) / previous if previous else 0.0
+            flag = " ⚠️" if change > tolerance else ""
+            print(f"{label + ' ' + name:<40}{previous:>12.3f}{current:>12.3f}{change:>+10.1%}{flag}")
+            if change > tolerance:
+                regressions.append((label, name, previous, current))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Hermetic pipeline benchmarks with synthetic PDFs and stubbed services.")
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--workdir", default="benchmarks/.runs")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Base latency of each stub LLM call (s)")
+    parser.add_argument("--tts-latency", type=float, default=0.05, help="Latency of each stub TTS call (s)")
+    parser.add_argument("--clip-seconds", type=float, default=2.0, help="Length of each stub audio clip (s)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the report under benchmarks/baselines/<commit>.json")
+    parser.add_argument("--compare", help="Baseline report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    parser.add_argument("--single", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        result = run_single(args.single, args.workdir, args.llm_latency, args.tts_latency, args.clip_seconds)
+        print(json.dumps(result))
+        return
+
+    report = run_suite(args.pages, args.workdir, args.llm_latency, args.tts_latency, args.clip_seconds)
+    os.makedirs(args.workdir, exist_ok=True)
+    report_path = os.path.join(args.workdir, "latest.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    print(f"Report written to {report_path}")
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        baseline_path = os.path.join(BASELINE_DIR, f"{report['commit']}.json")
+        shutil.copyfile(report_path, baseline_path)
+        print(f"✅ Baseline saved to {baseline_path}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
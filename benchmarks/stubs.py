@@ -0,0 +1,90 @@
+import json
+import os
+import random
+import time
+import wave
+from types import SimpleNamespace
+
+from PIL import Image
+
+from tracing import span, file_size
+
+
+class StubChatCompletions:
+    """
+    Stands in for client.chat.completions: returns canned SlideChunk JSON sized to
+    the prompt, after an injected latency of base + per_1k_chars * len(content).
+    """
+
+    def __init__(self, latency=0.5, latency_per_1k_chars=0.01, chars_per_slide=4000, seed=0):
+        self.latency = latency
+        self.latency_per_1k_chars = latency_per_1k_chars
+        self.chars_per_slide = chars_per_slide
+        self.rng = random.Random(seed)
+        self.calls = 0
+
+    def create(self, model, messages, temperature=None, max_tokens=None, **kwargs):
+        prompt = messages[-1]["content"]
+        content = prompt.split("Content:\n", 1)[-1]
+        time.sleep(self.latency + self.latency_per_1k_chars * len(content) / 1000)
+        self.calls += 1
+
+        slide_count = max(1, len(content) // self.chars_per_slide)
+        words = content.split()
+        slides = []
+        for i in range(slide_count):
+            excerpt = words[i * 40:(i + 1) * 40] or words[:40]
+            slides.append({
+                "title": f"Topic {self.calls}.{i + 1}",
+                "content": " ".join(excerpt[:12]),
+                "key_points": [" ".join(excerpt[j:j + 6]) for j in range(12, 30, 6)],
+                "voice_over": " ".join(excerpt),
+            })
+        body = json.dumps({
+            "slides": slides,
+            "short_segments": [{"title": "Short", "content": slides[0]["content"], "script": slides[0]["voice_over"], "duration": 30}],
+            "theme_colors": {"primary": "#1F497D", "secondary": "#4F81BD", "accent": "#C0504D", "background": "#FFFFFF", "text": "#000000"},
+        })
+        usage = SimpleNamespace(prompt_tokens=len(prompt) // 4, completion_tokens=len(body) // 4)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=body))], usage=usage)
+
+
+class StubLLMClient:
+    def __init__(self, **options):
+        self.chat = SimpleNamespace(completions=StubChatCompletions(**options))
+
+
+def make_stub_tts(clip_seconds=2.0, latency=0.05, sample_rate=22050):
+    """
+    Replacement for audio.generate_audio: after `latency` seconds, writes a silent
+    clip of fixed length. The content is WAV, which ffmpeg reads regardless of the
+    .mp3 extension the pipeline uses.
+    """
+    def generate_audio(script, output_file, voice="stub", rate="+0%"):
+        with span("tts.clip", voice=voice, chars=len(script), bytes_in=len(script.encode("utf-8"))) as clip_span:
+            time.sleep(latency)
+            with wave.open(output_file, "wb") as w:
+                w.setnchannels(1)
+                w.setsampwidth(2)
+                w.setframerate(sample_rate)
+                w.writeframes(b"\0\0" * int(sample_rate * clip_seconds))
+            clip_span.set(bytes_out=file_size(output_file))
+    return generate_audio
+
+
+def stub_slides_to_images(ppt_path, output_folder, soffice_profile=None, start_index=0, size=(1600, 900)):
+    """
+    Rasterizer for machines without LibreOffice: one flat PNG per slide in the deck.
+    """
+    from pptx import Presentation
+
+    paths = []
+    for i, _ in enumerate(Presentation(ppt_path).slides):
+        path = os.path.join(output_folder, f"slide_{start_index + i}.png")
+        Image.new("RGB", size, (31 + (start_index + i) % 200, 73, 125)).save(path)
+        paths.append(path)
+    return paths
+
+def soffice_available():
+    from presentation import SOFFICE_BINARY
+    return os.path.exists(SOFFICE_BINARY)
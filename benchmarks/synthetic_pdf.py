@@ -0,0 +1,43 @@
+import os
+import random
+
+import fitz  # PyMuPDF
+
+WORDS = (
+    "model data training feature label gradient loss accuracy promise callback async "
+    "function value error network layer input output weight bias regression class "
+    "cluster sample test validation pipeline vector matrix result state event"
+).split()
+
+
+def make_paragraph(rng, sentences=6):
+    sentences_text = []
+    for _ in range(sentences):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(8, 18))]
+        sentences_text.append(" ".join(words).capitalize() + ".")
+    return " ".join(sentences_text)
+
+def generate_pdf(path, pages, seed=0, paragraphs_per_page=5):
+    """
+    Write a deterministic text-only PDF with the given number of pages, sized
+    roughly like a page of course notes (~3 KB of text per page).
+    """
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for page_number in range(pages):
+        page = doc.new_page()
+        text = f"Section {page_number + 1}\n\n" + "\n\n".join(make_paragraph(rng) for _ in range(paragraphs_per_page))
+        page.insert_textbox(fitz.Rect(50, 50, page.rect.width - 50, page.rect.height - 50), text, fontsize=9)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    doc.save(path)
+    doc.close()
+    return path
+
+def synthetic_pdf(pages, directory="benchmarks/.data", seed=0):
+    """
+    Path to a cached synthetic PDF with this page count, generated on first use.
+    """
+    path = os.path.join(directory, f"synthetic_{pages}p_seed{seed}.pdf")
+    if not os.path.exists(path):
+        generate_pdf(path, pages, seed=seed)
+    return path
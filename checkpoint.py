@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+def hash_text(text):
+    return hash_bytes(text.encode("utf-8"))
+
+def hash_file(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def hash_inputs(*parts):
+    """
+    Hash an arbitrary mix of strings, numbers, dicts and lists into one stable key.
+    """
+    return hash_text(json.dumps(parts, sort_keys=True, default=str))
+
+def make_run_id(pdf_hash, config):
+    """
+    A run is identified by the PDF bytes and the video config, so re-running the
+    same document with the same settings lands in the same checkpoint directory.
+    """
+    config_json = config.model_dump_json() if hasattr(config, "model_dump_json") else json.dumps(config, sort_keys=True)
+    return hash_inputs(pdf_hash, config_json)[:16]
+
+
+class RunCheckpoint:
+    """
+    Per-run stage manifest stored at <output_dir>/runs/<run_id>/manifest.json.
+
+    Every stage entry records the run ID, a hash of the stage inputs and the sha256
+    of every artifact it produced. A stage is only reused when resuming, when its
+    input hash still matches and when every artifact is still on disk unchanged.
+    """
+
+    def __init__(self, output_dir, run_id, resume=False):
+        self.run_id = run_id
+        self.resume = resume
+        self.run_dir = os.path.join(output_dir, "runs", run_id)
+        self.manifest_path = os.path.join(self.run_dir, "manifest.json")
+        os.makedirs(self.run_dir, exist_ok=True)
+
+        self.stages = {}
+        # Stages may finish on different threads (audio runs alongside slide rendering)
+        self._lock = threading.Lock()
+        if resume and os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("run_id") == run_id:
+                self.stages = manifest.get("stages", {})
+
+    def path(self, *parts):
+        """
+        Absolute path for an artifact inside this run's directory.
+        """
+        full_path = os.path.join(self.run_dir, *parts)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        return full_path
+
+    def is_complete(self, stage, input_hash):
+        """
+        True if the stage can be skipped: resuming, same inputs, artifacts intact.
+        """
+        if not self.resume:
+            return False
+        entry = self.stages.get(stage)
+        if not entry or entry.get("input_hash") != input_hash:
+            return False
+        for rel_path, expected in entry.get("artifacts", {}).items():
+            path = os.path.join(self.run_dir, rel_path)
+            if not os.path.exists(path) or hash_file(path) != expected:
+                print(f"⚠️ Checkpoint artifact {rel_path} is missing or changed, re-running '{stage}'")
+                return False
+        return True
+
+    def is_edited(self, stage, input_hash):
+        """
+        True when resuming a stage whose inputs are unchanged but whose artifacts
+        were modified on disk since it was saved, i.e. edited by hand.
+        """
+        entry = self.stages.get(stage) if self.resume else None
+        if not entry or entry.get("input_hash") != input_hash:
+            return False
+        changed = False
+        for rel_path, expected in entry.get("artifacts", {}).items():
+            path = os.path.join(self.run_dir, rel_path)
+            if not os.path.exists(path):
+                return False
+            changed = changed or hash_file(path) != expected
+        return changed
+
+    def load(self, stage):
+        return self.stages[stage].get("data")
+
+    def artifacts(self, stage):
+        return [os.path.join(self.run_dir, rel_path) for rel_path in self.stages[stage].get("artifacts", {})]
+
+    def save(self, stage, input_hash, data=None, artifacts=()):
+        """
+        Record a completed stage and flush the manifest atomically.
+        """
+        entry = {
+            "run_id": self.run_id,
+            "input_hash": input_hash,
+            "data": data,
+            "artifacts": {os.path.relpath(path, self.run_dir): hash_file(path) for path in artifacts},
+            "completed_at": time.time(),
+        }
+        with self._lock:
+            self.stages[stage] = entry
+            self._flush()
+
+    def _flush(self):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"run_id": self.run_id, "stages": self.stages}, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, self.manifest_path)
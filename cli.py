@@ -0,0 +1,85 @@
+"""
+Command-line entry point for the PDF -> video pipeline.
+
+Only argparse is imported up front; the pipeline module, and through it each
+heavy dependency, is loaded after the arguments are parsed and only by the
+stages that run. `--help` therefore returns immediately, and `--dry-run` never
+touches the LLM, TTS or video libraries.
+"""
+import argparse
+import json
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Convert a PDF into a narrated video.")
+    parser.add_argument("pdf", nargs="?", help="PDF to convert (defaults to Args.pdf_path in main_version_4.py)")
+    parser.add_argument("--output", help="Output directory (default: Args.output)")
+    parser.add_argument("--theme", help="professional, creative or minimal")
+    parser.add_argument("--voice", help="Narration style: neutral, enthusiastic or formal")
+    parser.add_argument("--language")
+    parser.add_argument("--animation", choices=["none", "subtle", "moderate", "dynamic"],
+                        help="Slide transitions: none (hard cuts), subtle/moderate (crossfade) or dynamic (slide-in)")
+    parser.add_argument("--languages", help="Extra narration languages over the same video, e.g. es,fr,de")
+    parser.add_argument("--audio-tracks", choices=["streams", "files"], default="streams",
+                        help="Add extra languages as audio streams of one file, or write one file per language")
+    parser.add_argument("--resume", action="store_true", help="Skip stages already completed by a previous run")
+    parser.add_argument("--run-id", help="Run ID to resume (defaults to a hash of the PDF and config)")
+    parser.add_argument("--shorts", action="store_true", help="Also render 9:16 shorts from the same slides and audio")
+    parser.add_argument("--dedup-threshold", type=float,
+                        help="Similarity (0-1) above which slides count as duplicates and are merged; 0 disables")
+    parser.add_argument("--map-reduce", action="store_true",
+                        help="Summarize chunks in parallel, plan one outline, then generate slides per section (for very large PDFs)")
+    parser.add_argument("--burn-subtitles", action="store_true",
+                        help="Burn captions into the video as well as writing .srt/.vtt sidecars")
+    parser.add_argument("--api-path", help="Presenter-avatar API base URL")
+    parser.add_argument("--avatar", help="Presenter avatar image")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Plan chunks and the timeline without calling the LLM or TTS or rendering video")
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    from languages import parse_languages
+    try:
+        languages = parse_languages(args.languages)
+    except ValueError as e:
+        parser.error(str(e))
+
+    import main_version_4 as pipeline
+
+    defaults = pipeline.Args()
+    config = pipeline.VideoConfig(
+        theme=args.theme or defaults.theme,
+        language=args.language or defaults.language,
+        voice_style=args.voice or defaults.voice,
+        animation_level=args.animation or defaults.animation,
+        include_background_music=bool(defaults.music)
+    )
+    pdf_path = args.pdf or defaults.pdf_path
+    output_dir = args.output or defaults.output
+
+    if args.dry_run:
+        plan = pipeline.plan_run(pdf_path, config, output_dir=output_dir)
+        print(json.dumps(plan, indent=4, ensure_ascii=False))
+        return plan
+
+    api_path = args.api_path if args.api_path is not None else defaults.api_path
+    return pipeline.run_pipeline(
+        pdf_path, config,
+        output_dir=output_dir,
+        run_id=args.run_id,
+        resume=args.resume,
+        presenter_api=api_path or None,
+        avatar_path=(args.avatar or defaults.avatar) if api_path else None,
+        languages=languages,
+        audio_tracks=args.audio_tracks,
+        shorts=args.shorts,
+        dedup_threshold=pipeline.DEDUP_THRESHOLD if args.dedup_threshold is None else args.dedup_threshold,
+        map_reduce=args.map_reduce,
+        burn_subtitles=args.burn_subtitles
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import random
+import re
+import zlib
+from itertools import combinations
+
+# Slides whose shingle sets have a Jaccard similarity at or above this are
+# treated as the same slide
+DEDUP_THRESHOLD = 0.6
+SHINGLE_WORDS = 3
+NUM_PERM = 64
+BANDS = 16
+
+# Universal hashes (a * x + b) mod p; with p < 2**31 and 32-bit shingles the
+# products fit in uint64, so a whole signature is one vectorised numpy expression
+_PRIME = (1 << 31) - 1
+_rng = random.Random(1729)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def shingles(text, k=SHINGLE_WORDS):
+    """
+    Hashed k-word shingles of the normalised text (lower case, punctuation dropped).
+    """
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < k:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {zlib.crc32(" ".join(words[i:i + k]).encode("utf-8")) for i in range(len(words) - k + 1)}
+
+def minhash(shingle_set):
+    """
+    NUM_PERM-value MinHash signature. Two signatures agree at a position with
+    probability equal to the Jaccard similarity of their shingle sets.
+    """
+    import numpy as np
+
+    if not shingle_set:
+        return (0,) * NUM_PERM
+    a, b = (np.array(column, dtype=np.uint64)[:, None] for column in zip(*_PERMUTATIONS))
+    values = np.fromiter(shingle_set, dtype=np.uint64, count=len(shingle_set))[None, :]
+    return tuple(((a * values + b) % np.uint64(_PRIME)).min(axis=1).tolist())
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+def near_duplicate_pairs(texts, threshold=DEDUP_THRESHOLD):
+    """
+    Pairs (i, j), i < j, of texts whose shingle sets are at least `threshold`
+    similar. Candidates come from LSH over MinHash bands, so the cost grows with
+    the number of texts rather than the number of pairs; every candidate is then
+    checked against the exact Jaccard similarity.
+    """
+    sets = [shingles(text) for text in texts]
+    rows = NUM_PERM // BANDS
+    buckets = {}
+    for i, shingle_set in enumerate(sets):
+        if not shingle_set:
+            continue
+        signature = minhash(shingle_set)
+        for band in range(BANDS):
+            buckets.setdefault((band, signature[band * rows:(band + 1) * rows]), []).append(i)
+
+    candidates = set()
+    for members in buckets.values():
+        candidates.update(combinations(members, 2))
+    return sorted((i, j) for i, j in candidates if jaccard(sets[i], sets[j]) >= threshold)
+
+def _slide_text(slide):
+    return " ".join([slide.title, slide.content, *slide.key_points, slide.voice_over])
+
+def _clusters(pairs, count):
+    # Union-find: every item points at the earliest item it duplicates
+    parent = list(range(count))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in pairs:
+        a, b = find(i), find(j)
+        if a != b:
+            parent[max(a, b)] = min(a, b)
+    return [find(i) for i in range(count)]
+
+def dedup_results(results, threshold=DEDUP_THRESHOLD):
+    """
+    Drop near-duplicate slides and short segments across all SlideChunk results.
+
+    The first slide of each duplicate group is kept, in place, and picks up any
+    key points only its duplicates had; the rest are removed before anything is
+    rendered or synthesized. Returns (results, report), where the results are new
+    SlideChunk objects and the report lists what was merged.
+    """
+    slides = [slide for chunk in results for slide in chunk.slides]
+    roots = _clusters(near_duplicate_pairs([_slide_text(slide) for slide in slides], threshold), len(slides))
+
+    kept = {}
+    merged = []
+    for i, root in enumerate(roots):
+        if root == i:
+            kept[i] = slides[i].model_copy(update={"key_points": list(slides[i].key_points)})
+            continue
+        keeper = kept[root]
+        keeper.key_points += [point for point in slides[i].key_points if point not in keeper.key_points]
+        merged.append({"kept": slides[root].title, "dropped": slides[i].title})
+
+    segments = [segment for chunk in results for segment in chunk.short_segments]
+    segment_roots = _clusters(
+        near_duplicate_pairs([f"{segment.title} {segment.content} {segment.script}" for segment in segments], threshold),
+        len(segments)
+    )
+    kept_segments = {id(segment) for i, segment in enumerate(segments) if segment_roots[i] == i}
+
+    deduped, index = [], 0
+    for chunk in results:
+        chunk_slides = []
+        for _ in chunk.slides:
+            if index in kept:
+                chunk_slides.append(kept[index])
+            index += 1
+        deduped.append(chunk.model_copy(update={
+            "slides": chunk_slides,
+            "short_segments": [segment for segment in chunk.short_segments if id(segment) in kept_segments],
+        }))
+
+    report = {
+        "threshold": threshold,
+        "slides_in": len(slides),
+        "slides_out": len(kept),
+        "shorts_in": len(segments),
+        "shorts_out": len(kept_segments),
+        "merged": merged,
+    }
+    return deduped, report
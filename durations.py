@@ -0,0 +1,116 @@
+"""
+Narration-length prediction, so the timeline can be laid out before TTS finishes.
+
+Every clip the pipeline synthesizes is also a calibration sample (its text and
+its probed duration). Samples are kept per voice and rate in the artifact store,
+and a least-squares fit of seconds against characters predicts new clips. Until
+a voice has MIN_SAMPLES samples, a words-per-second prior is used instead.
+"""
+from artifact_store import ArtifactStore
+
+# edge-tts en-GB-RyanNeural at rate +20% speaks roughly this many words per second
+DEFAULT_WORDS_PER_SECOND = 2.9
+MIN_SAMPLES = 5
+MAX_SAMPLES = 500
+
+
+class NarrationEstimator:
+    """
+    Predicts narration seconds for one voice and rate from past clips.
+    """
+
+    def __init__(self, store=None, voice="en-GB-RyanNeural", rate="+20%"):
+        self.store = store
+        self.key = ArtifactStore.key("tts-duration", voice, rate)
+        self.samples = (store.get_json("calibration", self.key) if store else None) or []
+        self._new = []
+        self._fit()
+
+    def _fit(self):
+        # seconds = intercept + slope * chars, by ordinary least squares
+        self.intercept, self.slope = 0.0, None
+        n = len(self.samples)
+        if n < MIN_SAMPLES:
+            return
+        mean_x = sum(chars for chars, _ in self.samples) / n
+        mean_y = sum(seconds for _, seconds in self.samples) / n
+        var_x = sum((chars - mean_x) ** 2 for chars, _ in self.samples)
+        if not var_x:
+            return
+        slope = sum((chars - mean_x) * (seconds - mean_y) for chars, seconds in self.samples) / var_x
+        if slope > 0:
+            self.slope = slope
+            self.intercept = max(0.0, mean_y - slope * mean_x)
+
+    @property
+    def calibrated(self):
+        return self.slope is not None
+
+    def estimate(self, script):
+        if not self.calibrated:
+            return len(script.split()) / DEFAULT_WORDS_PER_SECOND
+        return self.intercept + self.slope * len(script)
+
+    def observe(self, script, seconds):
+        """
+        Add one synthesized clip as a sample (call save() to keep it).
+        """
+        self._new.append([len(script), round(seconds, 3)])
+
+    def save(self):
+        """
+        Merge the new samples into the store's and refit. Samples written by other
+        processes since this estimator was created are re-read first, so at worst
+        a concurrent writer's last few samples are lost, never the whole history.
+        """
+        if not self._new:
+            return
+        stored = (self.store.get_json("calibration", self.key) if self.store else None) or self.samples
+        self.samples = (stored + self._new)[-MAX_SAMPLES:]
+        self._new = []
+        if self.store:
+            self.store.put_json("calibration", self.key, self.samples)
+        self._fit()
+
+
+def plan_timeline(scripts, estimator, titles=None, gap=0.0):
+    """
+    Predicted timeline: one entry per narration clip, laid end to end with `gap`
+    seconds (the transition between two slides) between consecutive clips.
+    """
+    timeline, start = [], 0.0
+    for i, script in enumerate(scripts):
+        duration = estimator.estimate(script)
+        entry = {"index": i, "start": round(start, 2), "predicted": round(duration, 2)}
+        if titles:
+            entry["title"] = titles[i]
+        timeline.append(entry)
+        start += duration + gap
+    return timeline
+
+def timeline_length(timeline, key="predicted"):
+    """
+    Seconds from the first clip's start to the end of the last one.
+    """
+    return timeline[-1]["start"] + timeline[-1][key] if timeline else 0.0
+
+def reconcile_timeline(timeline, durations, gap=0.0):
+    """
+    Replace predicted durations with real ones once the audio exists; entries keep
+    the prediction for comparison and starts are recomputed from real durations
+    (and the same gap as the prediction). Returns (timeline, summary).
+    """
+    reconciled, start = [], 0.0
+    for entry, duration in zip(timeline, durations):
+        reconciled.append({**entry, "start": round(start, 2), "duration": round(duration, 2)})
+        start += duration + gap
+    errors = [abs(entry["predicted"] - entry["duration"]) for entry in reconciled]
+    gaps = gap * max(0, len(reconciled) - 1)
+    predicted_total = sum(entry["predicted"] for entry in reconciled) + gaps
+    summary = {
+        "predicted_s": round(predicted_total, 2),
+        "actual_s": round(sum(durations[:len(reconciled)]) + gaps, 2),
+        "mean_abs_error_s": round(sum(errors) / len(errors), 2) if errors else 0.0,
+        "max_abs_error_s": round(max(errors), 2) if errors else 0.0,
+    }
+    return reconciled, summary
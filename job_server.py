@@ -0,0 +1,289 @@
+import argparse
+import json
+import mmap
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from email.parser import HeaderParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from artifact_store import ArtifactStore
+from workers import StageLimits, SofficePool, default_governor
+
+STAGES = ["text", "chunks", "slides", "audio", "segments", "final"]
+MAX_UPLOAD_BYTES = 200 * 1024 * 1024
+STREAM_CHUNK_SIZE = 256 * 1024
+# Form fields other than the PDF are short option values
+MAX_FIELD_BYTES = 1024
+
+
+class JobQueue:
+    """
+    In-process job queue around run_pipeline.
+
+    Jobs run on a bounded thread pool; everything beyond max_concurrent waits in
+    the executor's queue with status "queued". All documents share one set of
+    stage limits and one artifact store, like a batch run.
+    """
+
+    def __init__(self, root, max_concurrent=2):
+        self.root = root
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=max_concurrent)
+        self.limits = StageLimits(render=os.cpu_count() or 1, soffice_pool=SofficePool(max_concurrent),
+                                  governor=default_governor())
+        self.store = ArtifactStore(os.getenv("ARTIFACT_STORE_DIR", os.path.join(root, "store")))
+        os.makedirs(root, exist_ok=True)
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+        self.limits.soffice_pool.close()
+
+    def submit(self, write_pdf, options):
+        """
+        Queue a job. write_pdf(path) stores the upload at path; the client's file
+        name is never used, every job's input is <job dir>/input.pdf.
+        """
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(self.root, "jobs", job_id)
+        os.makedirs(job_dir, exist_ok=True)
+        pdf_path = os.path.join(job_dir, "input.pdf")
+        try:
+            write_pdf(pdf_path)
+        except BaseException:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+
+        with self.lock:
+            self.jobs[job_id] = {
+                "job_id": job_id,
+                "status": "queued",
+                "stages": {stage: {"done": 0, "total": None} for stage in STAGES},
+                "submitted_at": time.time(),
+                "video_path": None,
+                "error": None,
+            }
+        self.pool.submit(self._run, job_id, pdf_path, job_dir, options)
+        return job_id
+
+    def _update(self, job_id, **fields):
+        with self.lock:
+            self.jobs[job_id].update(fields)
+
+    def _run(self, job_id, pdf_path, job_dir, options):
+        from main_version_4 import run_pipeline, VideoConfig
+
+        def progress(stage, done, total):
+            with self.lock:
+                self.jobs[job_id]["stages"][stage] = {"done": done, "total": total}
+
+        self._update(job_id, status="processing", started_at=time.time())
+        try:
+            video_path = run_pipeline(
+                pdf_path, VideoConfig(**options),
+                output_dir=job_dir,
+                limits=self.limits,
+                store=self.store,
+                progress=progress
+            )
+            self._update(job_id, status="completed", video_path=video_path, finished_at=time.time())
+        except Exception as e:
+            traceback.print_exc()
+            self._update(job_id, status="failed", error=f"{type(e).__name__}: {e}", finished_at=time.time())
+
+    def status(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            payload = {key: value for key, value in job.items() if key != "video_path"}
+            payload["stages"] = {stage: dict(value) for stage, value in job["stages"].items()}
+        if payload["status"] == "completed":
+            payload["download_url"] = f"/download-video/{job_id}"
+        return payload
+
+    def video_path(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return job["video_path"] if job and job["status"] == "completed" else None
+
+
+def parse_range(header, size):
+    """
+    Parse a single-range "bytes=start-end" header. Returns (start, end) inclusive,
+    None when there is no usable header, or raises ValueError if unsatisfiable.
+    """
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", (header or "").strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    start, end = match.groups()
+    if start == "":
+        # Suffix range: the last N bytes
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start, end = int(start), min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError("unsatisfiable range")
+    return start, end
+
+
+def multipart_parts(body, boundary):
+    """
+    (headers, start, end) for each part of a multipart body, with start and end
+    the offsets of the part's content. body is a memory map (or bytes), so the
+    parts are located without reading an upload into memory.
+    """
+    delimiter = b"--" + boundary.encode("latin-1")
+    position = body.find(delimiter)
+    if position < 0:
+        raise ValueError("no multipart boundary in the body")
+    parts = []
+    while True:
+        position += len(delimiter)
+        if body[position:position + 2] == b"--":
+            return parts
+        header_end = body.find(b"\r\n\r\n", position)
+        if header_end < 0:
+            raise ValueError("truncated multipart headers")
+        headers = HeaderParser(policy=default_policy).parsestr(body[position:header_end].decode("latin-1").strip())
+        end = body.find(b"\r\n" + delimiter, header_end + 4)
+        if end < 0:
+            raise ValueError("truncated multipart body")
+        parts.append((headers, header_end + 4, end))
+        position = end + 2
+
+def copy_range(body, start, end, path):
+    with open(path, "wb") as f:
+        for offset in range(start, end, STREAM_CHUNK_SIZE):
+            f.write(body[offset:min(offset + STREAM_CHUNK_SIZE, end)])
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    jobs: JobQueue = None
+
+    def _send_json(self, payload, code=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/generate-video":
+            return self._send_json({"detail": "Not found"}, 404)
+
+        length = int(self.headers.get("Content-Length", 0))
+        if length <= 0 or length > MAX_UPLOAD_BYTES:
+            return self._send_json({"detail": "Missing or oversized upload"}, 413)
+        content_type = self.headers.get("Content-Type", "")
+        boundary = re.search(r'boundary="?([^";]+)"?', content_type)
+        if not content_type.startswith("multipart/form-data") or not boundary:
+            return self._send_json({"detail": "Expected multipart/form-data"}, 400)
+
+        # The body is spooled to disk in chunks and parsed through a memory map,
+        # so an upload never has to fit in memory
+        with tempfile.TemporaryFile(dir=self.jobs.root) as spool:
+            remaining = length
+            while remaining:
+                block = self.rfile.read(min(STREAM_CHUNK_SIZE, remaining))
+                if not block:
+                    return self._send_json({"detail": "Upload ended early"}, 400)
+                spool.write(block)
+                remaining -= len(block)
+            spool.flush()
+            with mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ) as body:
+                try:
+                    parts = multipart_parts(body, boundary.group(1))
+                except ValueError as e:
+                    return self._send_json({"detail": f"Malformed upload: {e}"}, 400)
+                pdf_part, options = None, {}
+                for headers, start, end in parts:
+                    name = headers.get_param("name", header="content-disposition")
+                    if headers.get_filename() and name in ("pdf", "file"):
+                        pdf_part = (start, end)
+                    elif name in ("theme", "language", "voice_style", "aspect_ratio", "resolution"):
+                        if end - start > MAX_FIELD_BYTES:
+                            return self._send_json({"detail": f"Field '{name}' is too long"}, 400)
+                        options[name] = body[start:end].decode("utf-8", "replace").strip()
+                if pdf_part is None:
+                    return self._send_json({"detail": "Upload a PDF in the 'pdf' field"}, 400)
+                job_id = self.jobs.submit(lambda path: copy_range(body, *pdf_part, path), options)
+        self._send_json({"job_id": job_id, "status": "queued"}, 202)
+
+    def do_GET(self):
+        match = re.fullmatch(r"/(job-status|download-video)/([0-9a-f]+)/?", self.path)
+        if not match:
+            return self._send_json({"detail": "Not found"}, 404)
+        endpoint, job_id = match.groups()
+
+        if endpoint == "job-status":
+            status = self.jobs.status(job_id)
+            return self._send_json(status, 200) if status else self._send_json({"detail": "Unknown job"}, 404)
+
+        video_path = self.jobs.video_path(job_id)
+        if video_path is None:
+            return self._send_json({"detail": "Video not ready"}, 404)
+        self._send_file(video_path)
+
+    def _send_file(self, path):
+        size = os.path.getsize(path)
+        try:
+            byte_range = parse_range(self.headers.get("Range"), size)
+        except ValueError:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.end_headers()
+            return
+
+        start, end = byte_range or (0, size - 1)
+        self.send_response(206 if byte_range else 200)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        if byte_range:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                block = f.read(min(STREAM_CHUNK_SIZE, remaining))
+                if not block:
+                    break
+                self.wfile.write(block)
+                remaining -= len(block)
+
+
+def serve(host="127.0.0.1", port=8000, root="Output/service", max_concurrent=2):
+    JobRequestHandler.jobs = JobQueue(root, max_concurrent=max_concurrent)
+    server = ThreadingHTTPServer((host, port), JobRequestHandler)
+    print(f"✅ Job service listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        JobRequestHandler.jobs.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP job service for PDF -> video conversion.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--root", default="Output/service", help="Where uploads, job outputs and the artifact store are kept")
+    parser.add_argument("--max-concurrent", type=int, default=2, help="Jobs processed at the same time")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.root, args.max_concurrent)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Narration languages: the edge-tts voice used for each language, its English name
+for translation prompts, and the ISO 639-2 code written into audio stream metadata.
+"""
+
+LANGUAGES = {
+    "en": ("English", "eng", "en-GB-RyanNeural"),
+    "es": ("Spanish", "spa", "es-ES-AlvaroNeural"),
+    "fr": ("French", "fra", "fr-FR-HenriNeural"),
+    "de": ("German", "deu", "de-DE-ConradNeural"),
+    "it": ("Italian", "ita", "it-IT-DiegoNeural"),
+    "pt": ("Portuguese", "por", "pt-BR-AntonioNeural"),
+    "nl": ("Dutch", "nld", "nl-NL-MaartenNeural"),
+    "hi": ("Hindi", "hin", "hi-IN-MadhurNeural"),
+    "ja": ("Japanese", "jpn", "ja-JP-KeitaNeural"),
+    "ko": ("Korean", "kor", "ko-KR-InJoonNeural"),
+    "zh": ("Chinese", "zho", "zh-CN-YunxiNeural"),
+    "ar": ("Arabic", "ara", "ar-SA-HamedNeural"),
+    "ru": ("Russian", "rus", "ru-RU-DmitryNeural"),
+}
+
+
+def _lookup(language):
+    code = language.split("-")[0].lower()
+    if code not in LANGUAGES:
+        raise ValueError(f"Unsupported narration language '{language}' (known: {', '.join(sorted(LANGUAGES))})")
+    return LANGUAGES[code]
+
+def language_name(language):
+    return _lookup(language)[0]
+
+def iso639_2(language):
+    return _lookup(language)[1]
+
+def voice_for(language):
+    return _lookup(language)[2]
+
+def parse_languages(value):
+    """
+    "es, fr,de" -> ["es", "fr", "de"], validated against LANGUAGES.
+    """
+    languages = [code.strip() for code in (value or "").split(",") if code.strip()]
+    for language in languages:
+        _lookup(language)
+    return languages
@@ -2,10 +2,9 @@ import fitz  # PyMuPDF
 from openai import OpenAI
 from pptx import Presentation
 from pptx.util import Inches, Pt
-from moviepy.editor import VideoFileClip, ImageClip, CompositeVideoClip, concatenate_videoclips, AudioFileClip
 from pydantic import BaseModel, ValidationError
-import tempfile
 import os
+import glob
 import json
 import textwrap
 from pydantic import BaseModel, Field
@@ -14,6 +13,8 @@ from dotenv import load_dotenv
 from yt_shorts import process_shorts_from_results
 from presentation import generate_presentation, slides_to_images
 from audio import generate_audio
+from assembler import StreamingAssembler
+from checkpoint import hash_file, make_run_id
 import time
 import requests
 import json
@@ -148,58 +149,42 @@ def main():
     intro_voice_over = f"Hey folks! Welcome back to the channel. Today, we’re diving into something super cool — {topic}. Let’s get into it!"
     end_voice_over = "Thanks for hanging out with us! If you’re vibing with the content, hit that like button, share it with your crew, and smash that subscribe. Drop your thoughts or ideas in the comments — we love hearing from you!"
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        slide_imgs = slides_to_images(ppt_file, tmpdir)
-
-        clips = []
-
-        slide_img = slide_imgs[0]
-        audio_path = f"Output/intro_audio.mp3"
+    # Slide images, narration and segments stay in Output/build2/<run id> next to
+    # an edit-decision list, so a re-run of the same PDF and config only
+    # re-encodes the slides whose image or narration changed and stream-copies
+    # the rest, while runs for other inputs get their own directory
+    build_dir = os.path.join("Output", "build2", make_run_id(hash_file(args.pdf_path), config))
+    os.makedirs(build_dir, exist_ok=True)
+    # Rasters and narration from a previous, longer deck are not part of this one
+    for path in glob.glob(os.path.join(build_dir, "slide_*.png")) + glob.glob(os.path.join(build_dir, "*_audio.mp3")):
+        os.remove(path)
+    slide_imgs = slides_to_images(ppt_file, build_dir)
+
+    # Each segment is encoded as soon as its audio exists and only its path is
+    # kept, so memory and open files stay flat however long the deck is
+    with StreamingAssembler(os.path.join(build_dir, "segments"), edl_path=os.path.join(build_dir, "edl.json")) as assembler:
+        audio_path = os.path.join(build_dir, "intro_audio.mp3")
         generate_audio(intro_voice_over,audio_path)
-        audio = AudioFileClip(audio_path)
-        image_clip = ImageClip(slide_img).set_duration(audio.duration)
-        final_clip = CompositeVideoClip([image_clip]).set_audio(audio)
-        clips.append(final_clip)
+        assembler.add(slide_imgs[0], audio_path)
 
         for i, slide in enumerate(all_slides):
-            slide_img = slide_imgs[i+1]
-            audio_path = f"Output/{i}_audio.mp3"
+            audio_path = os.path.join(build_dir, f"{i}_audio.mp3")
             generate_audio(slide.voice_over,audio_path)
-            audio = AudioFileClip(audio_path)
-            image_clip = ImageClip(slide_img).set_duration(audio.duration)
-           
-            final_clip = CompositeVideoClip([image_clip]).set_audio(audio)
-            clips.append(final_clip)
-
-        slide_img = slide_imgs[-1]
-        audio_path = f"Output/ending_audio.mp3"
+            assembler.add(slide_imgs[i+1], audio_path)
+
+        audio_path = os.path.join(build_dir, "ending_audio.mp3")
         generate_audio(end_voice_over,audio_path)
-        audio = AudioFileClip(audio_path)
-        image_clip = ImageClip(slide_img).set_duration(audio.duration)
-        final_clip = CompositeVideoClip([image_clip]).set_audio(audio)
-        clips.append(final_clip)
-
-        # Concatenate all clips
-        final_video = concatenate_videoclips(clips, method="compose")
-        #final_video.write_videofile("final_video.mp4", fps=24)
-        final_video.write_videofile(
-                 "Output/final_video2.mp4",
-                 fps=24,
-                 codec="libx264",         # Good video codec
-                 audio_codec="aac",       # Ensure AAC audio
-                 audio_bitrate="192k"     # Reasonable audio quality
-        )
-        print("✅ Main Video exported")
-
-        # # Generate YouTube Shorts
-        # shorts_config = VideoConfig(
-        #     theme=config.theme,
-        #     language=config.language,
-        #     voice_style=config.voice_style,
-        #     aspect_ratio="9:16"
-        # )
-        # process_shorts_from_results(results, shorts_config)
-        # print("✅ YouTube Shorts generated")
+        assembler.add(slide_imgs[-1], audio_path)
+
+        assembler.finish("Output/final_video2.mp4")
+        for path in glob.glob(os.path.join(build_dir, "segments", "segment_*.mp4")):
+            if path not in assembler.segment_paths:
+                os.remove(path)
+    print("✅ Main Video exported")
+
+    # # Generate YouTube Shorts
+    # process_shorts_from_results(results, output_dir="Output", slide_imgs=slide_imgs)
+    # print("✅ YouTube Shorts generated")
 
 class Args:
     pdf_path = 'contents/Basics_of_Machine_Learning_Notes.pdf'
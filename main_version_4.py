@@ -1,28 +1,45 @@
-import fitz  # PyMuPDF
-from openai import OpenAI
-from pptx import Presentation
-from pptx.util import Inches, Pt
-from moviepy.editor import VideoFileClip, ImageClip, CompositeVideoClip, concatenate_videoclips, AudioFileClip
+# Heavy dependencies (openai, fitz, pptx, pdf2image, edge-tts, requests) are
+# imported inside the stage that needs them, so importing this module, --help and
+# --dry-run stay fast; see cli.py for the command-line entry point.
 from pydantic import BaseModel, ValidationError
-import tempfile
 import os
 import json
+import time
 import textwrap
+from contextlib import nullcontext
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict
 from dotenv import load_dotenv
-from yt_shorts import process_shorts_from_results
-from presentation import generate_presentation, slides_to_images
+from presentation import (resolve_slide_contents, presentation_title_for, generate_presentation,
+                          generate_sharded_presentation, slides_to_images, sharded_slides_to_images)
 from audio import generate_audio
-import time
-import requests
+from checkpoint import RunCheckpoint, hash_file, hash_text, hash_inputs, make_run_id
+from artifact_store import ArtifactStore
+from workers import StageLimits, SofficePool, default_governor
+from tracing import Tracer, span, file_size, submit_in_context
+from assembler import (encode_still_segment, concat_segments, probe_duration, build_audio_track, mux_audio_tracks,
+                       segment_input_hash, EditDecisionList, VIDEO_ARGS, AUDIO_ARGS)
+from languages import language_name, iso639_2, voice_for
+from dedup import dedup_results, DEDUP_THRESHOLD
+from routing import route, current_route_stats, collect_route_stats
+from durations import NarrationEstimator, plan_timeline, reconcile_timeline, timeline_length
+from transitions import transition_style, transition_input_hash, encode_transition
+from subtitles import load_word_timings, build_cues, shift_cues, write_srt, write_sidecars
 
 load_dotenv()
 
-client = OpenAI(
-    base_url=os.getenv("ENDPOINT"),
-    api_key=os.getenv("TOKEN"),
-)
+# Created on first use by get_client(); tests and benchmarks may assign a stand-in
+client = None
+
+def get_client():
+    global client
+    if client is None:
+        from openai import OpenAI
+        client = OpenAI(
+            base_url=os.getenv("ENDPOINT"),
+            api_key=os.getenv("TOKEN"),
+        )
+    return client
 
 # Data models
 class SlideItem(BaseModel):
@@ -42,6 +59,13 @@ class SlideChunk(BaseModel):
     short_segments: List[ShortVideoSegment] = Field(default_factory=list)
     theme_colors: Optional[Dict[str, str]] = None
 
+class SectionSummary(BaseModel):
+    title: str
+    summary: str
+
+class Outline(BaseModel):
+    sections: List[SectionSummary]
+
 class VideoConfig(BaseModel):
     theme: str = "professional"
     presenter_type: str = "human"
@@ -54,6 +78,8 @@ class VideoConfig(BaseModel):
 
 # Step 1: Extract PDF Content
 def extract_text_from_pdf(pdf_path):
+    import fitz  # PyMuPDF
+
     print("Extracting text from PDF...")
     doc = fitz.open(pdf_path)
     text = ""
@@ -68,8 +94,7 @@ def chunk_text(text, chunk_size=100000):
     print(f"✅ Created {len(chunks)} chunks.")
     return chunks
 
-def generate_chunk_content(chunk, config):
-    print("Generating structured content with OpenAI...")
+def build_chunk_prompt(chunk, config):
     theme_desc = {
         "professional": "formal, corporate style with clean design",
         "creative": "vibrant, engaging style with dynamic elements",
@@ -94,30 +119,291 @@ def generate_chunk_content(chunk, config):
         f"Content:\n{chunk}\n\n"
         "Respond with valid JSON only. Keep all content factual and based on the input material."
     )
+    return prompt
 
-    response = client.chat.completions.create(
-        model="openai/gpt-4.1",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.3,
-        max_tokens=16000
-    ).choices[0].message.content.strip()
-
+def strip_code_fence(response):
     if response.startswith("```json"):
         response = response.lstrip("```json").rstrip("```").strip()
     elif response.startswith("```"):
         response = response.lstrip("```").rstrip("```").strip()
+    return response
+
+def parse_chunk_response(response):
+    response = strip_code_fence(response)
+    return response, SlideChunk(**json.loads(response))
+
+def _chat(prompt, task, span_name, store=None, max_tokens=None, **attrs):
+    """
+    Send one prompt along a route, with the artifact store in front of it (keyed by
+    model and prompt). max_tokens defaults to the route's size for the prompt.
+    Returns (reply with code fences stripped, cache key, cached, finish reason).
+    """
+    policy = route(task)
+    cache_key = ArtifactStore.key("chat", policy.model, prompt)
+    response = store.get_json("llm", cache_key) if store else None
+    cached = response is not None
+    finish_reason = None
+    max_tokens = max_tokens or policy.tokens_for(prompt)
+    with span(span_name, route=task, model=policy.model, max_tokens=max_tokens,
+              bytes_in=len(prompt.encode("utf-8")), cached=cached, **attrs) as llm_span:
+        if cached:
+            current_route_stats().record_cache_hit(task, policy.model)
+            print("⏩ LLM cache hit.")
+        else:
+            started = time.perf_counter()
+            try:
+                completion = get_client().chat.completions.create(
+                    model=policy.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=policy.temperature,
+                    max_tokens=max_tokens
+                )
+            except Exception:
+                current_route_stats().record_call(task, policy.model, time.perf_counter() - started, ok=False)
+                raise
+            choice = completion.choices[0]
+            response = strip_code_fence(choice.message.content.strip())
+            finish_reason = getattr(choice, "finish_reason", None)
+            usage = completion.usage
+            current_route_stats().record_call(task, policy.model, time.perf_counter() - started,
+                                              tokens_in=usage.prompt_tokens if usage else 0,
+                                              tokens_out=usage.completion_tokens if usage else 0)
+            if usage:
+                llm_span.set(tokens_in=usage.prompt_tokens, tokens_out=usage.completion_tokens)
+            llm_span.set(finish_reason=finish_reason)
+        llm_span.set(bytes_out=len(response.encode("utf-8")))
+    return response, cache_key, cached, finish_reason
+
+def build_repair_prompt(response, error):
+    return (
+        "The reply below was supposed to be valid JSON for a program, but it could not be used:\n"
+        f"{error}\n\n"
+        "Return the corrected JSON only. Keep the same structure and content; fix syntax, escaping "
+        "or missing fields, without adding commentary.\n\n"
+        f"Reply:\n{response}"
+    )
+
+def cached_completion(prompt, parse, task, store=None, span_name=None, limits=None, **attrs):
+    """
+    One chat completion for a routed task (see routing.ROUTES), with the artifact
+    store in front of it. parse(response) validates the reply and returns the
+    result. Each call waits for the concurrency lane of its own route in limits,
+    so a repair never holds (or queues in) the heavy lane of the call it fixes.
 
+    A reply cut off at max_tokens is retried on its own route with the route's
+    ceiling. A reply that still does not parse gets one pass through the "repair"
+    route; repaired replies are cached under their own key, which names both
+    models, never under the original model's key.
+    """
+    policy = route(task)
+    span_name = span_name or f"llm.{task}"
+    limits = limits or StageLimits()
+    repaired_key = ArtifactStore.key("chat-repaired", policy.model, route("repair").model, prompt)
+    if store and store.get_path("llm", ArtifactStore.key("chat", policy.model, prompt)) is None:
+        repaired = store.get_json("llm", repaired_key)
+        if repaired is not None:
+            print("⏩ LLM cache hit (repaired reply).")
+            return parse(repaired)
+
+    with limits.lane(policy.lane):
+        response, cache_key, cached, finish_reason = _chat(prompt, task, span_name, store=store, **attrs)
+    if finish_reason == "length" and policy.tokens_for(prompt) < policy.max_tokens:
+        current_route_stats().record_failure(task, policy.model)
+        print(f"⚠️ {task} reply was cut off at {policy.tokens_for(prompt)} tokens, retrying with {policy.max_tokens}...")
+        with limits.lane(policy.lane):
+            response, cache_key, cached, finish_reason = _chat(prompt, task, span_name, store=store,
+                                                               max_tokens=policy.max_tokens, retry=True, **attrs)
+    try:
+        result = parse(response)
+    except ValueError as e:
+        # json.JSONDecodeError and pydantic's ValidationError are both ValueErrors
+        current_route_stats().record_failure(task, policy.model)
+        print(f"⚠️ Unusable {task} reply ({type(e).__name__}), asking for a repair...")
+        with limits.lane(route("repair").lane):
+            response, _, _, _ = _chat(build_repair_prompt(response, e), "repair", "llm.repair", store=store)
+        try:
+            result = parse(response)
+        except ValueError:
+            current_route_stats().record_failure("repair", route("repair").model)
+            raise
+        if store:
+            store.put_json("llm", repaired_key, response)
+        return result
+    if store and not cached:
+        store.put_json("llm", cache_key, response)
+    return result
+
+def generate_chunk_content(chunk, config, store=None, limits=None):
+    print("Generating structured content with OpenAI...")
+    prompt = build_chunk_prompt(chunk, config)
     try:
-        parsed_response = json.loads(response)
-        validated_chunk = SlideChunk(**parsed_response)
+        validated_chunk = cached_completion(prompt, lambda response: parse_chunk_response(response)[1], "slides",
+                                            store=store, span_name="llm.chunk", limits=limits)
         print(validated_chunk)
     except (json.JSONDecodeError, ValidationError) as e:
-        print(f"Parsing error: {e}\nResponse was: {response}")
+        print(f"Parsing error: {e}")
         raise
 
     print("✅ Structured content generated.")
     return validated_chunk
 
+# Narration scripts are translated in batches of about this many characters
+TRANSLATION_BATCH_CHARS = 8000
+
+def build_translation_prompt(scripts, language):
+    return (
+        f"Translate each of the following narration scripts for a video into {language_name(language)}. "
+        "Keep the tone, keep technical terms accurate, and make each translation read naturally "
+        "when spoken aloud.\n\n"
+        "Respond with valid JSON only: an object with one key, 'translations', holding a list "
+        f"of exactly {len(scripts)} strings in the same order as the input.\n\n"
+        f"Scripts:\n{json.dumps(scripts, ensure_ascii=False, indent=1)}"
+    )
+
+def translate_scripts(scripts, language, store=None, limits=None):
+    """
+    Translate narration scripts with as few chat calls as possible: scripts are
+    packed into batches of up to TRANSLATION_BATCH_CHARS and each batch is one
+    request. Results are cached in the artifact store like chunk results.
+    """
+    batches, batch, size = [], [], 0
+    for script in scripts:
+        if batch and size + len(script) > TRANSLATION_BATCH_CHARS:
+            batches.append(batch)
+            batch, size = [], 0
+        batch.append(script)
+        size += len(script)
+    if batch:
+        batches.append(batch)
+
+    def parse(response):
+        translations = json.loads(response).get("translations")
+        if not isinstance(translations, list) or len(translations) != len(batch):
+            raise ValueError(f"Expected {len(batch)} translations into {language}, got: {response[:200]}")
+        return [str(text) for text in translations]
+
+    translated = []
+    for batch in batches:
+        translated += cached_completion(build_translation_prompt(batch, language), parse, "translation", store=store,
+                                        span_name="llm.translate", limits=limits, language=language,
+                                        count=len(batch))
+    print(f"✅ Narration translated into {language_name(language)} in {len(batches)} request(s).")
+    return translated
+
+# Map-reduce generation: small map chunks, summaries merged REDUCE_FANOUT at a
+# time until they fit in one outline prompt, then one slide request per section
+MAP_CHUNK_CHARS = 12000
+REDUCE_FANOUT = 8
+OUTLINE_INPUT_CHARS = 24000
+MAP_REDUCE_WORKERS = int(os.getenv("MAP_REDUCE_WORKERS", "8"))
+
+def build_map_prompt(chunk):
+    return (
+        "Summarize the following part of a longer document for someone who will build a presentation "
+        "from it. Keep definitions, key facts, figures and examples; drop repetition and filler.\n\n"
+        "Respond with valid JSON only: {\"title\": short title for this part, "
+        "\"summary\": the summary in at most 250 words}.\n\n"
+        f"Content:\n{chunk}"
+    )
+
+def build_reduce_prompt(summaries):
+    parts = "\n\n".join(f"## {item.title}\n{item.summary}" for item in summaries)
+    return (
+        "The following are summaries of consecutive parts of one document. Merge them into a single "
+        "summary of the whole, in document order, keeping every distinct topic and dropping repetition.\n\n"
+        "Respond with valid JSON only: {\"title\": short title, \"summary\": the merged summary in at most "
+        "400 words}.\n\n"
+        f"Summaries:\n{parts}"
+    )
+
+def build_outline_prompt(summaries):
+    parts = "\n\n".join(f"## {item.title}\n{item.summary}" for item in summaries)
+    return (
+        "Plan a presentation covering the whole document summarized below. Split it into 4-12 sections "
+        "in a logical teaching order, without overlapping topics.\n\n"
+        "Respond with valid JSON only: {\"sections\": [{\"title\": section title, \"summary\": what the section "
+        "must cover, 80-200 words}]}.\n\n"
+        f"Document summary:\n{parts}"
+    )
+
+def build_section_prompt(outline, index, config):
+    plan = "\n".join(f"{i + 1}. {section.title}" for i, section in enumerate(outline.sections))
+    section = outline.sections[index]
+    content = (
+        f"This is section {index + 1} of {len(outline.sections)} of a presentation with this outline:\n{plan}\n\n"
+        "Only create 2-5 slides for this section; the other sections are covered separately.\n\n"
+        f"Section: {section.title}\n{section.summary}"
+    )
+    return build_chunk_prompt(content, config)
+
+def _parse_model(model_class):
+    return lambda response: model_class(**json.loads(response))
+
+def _parallel(items, fn):
+    """
+    Run fn over items on a thread pool, in order (the calls take their LLM lanes
+    themselves). Worker threads inherit the tracing context so their spans nest
+    under the caller's.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=MAP_REDUCE_WORKERS) as pool:
+        futures = [submit_in_context(pool, fn, item) for item in items]
+        return [future.result() for future in futures]
+
+def generate_map_reduce_content(text, config, limits=None, store=None, progress=None):
+    """
+    Generation for book-length input, where one prompt per 100k characters no
+    longer scales:
+
+    1. map: summarize MAP_CHUNK_CHARS chunks in parallel with small prompts
+    2. reduce: merge summaries REDUCE_FANOUT at a time, level by level, until they
+       fit in OUTLINE_INPUT_CHARS, then plan one outline for the whole document
+    3. generate slides and voice-overs per outline section, in parallel, each
+       prompt seeing the full outline so the deck stays coherent
+
+    Returns one SlideChunk per section, like generate_chunk_content per chunk.
+    """
+    limits = limits or StageLimits()
+    progress = progress or (lambda stage, done, total: None)
+    chunks = chunk_text(text, MAP_CHUNK_CHARS)
+
+    with span("map", count=len(chunks)):
+        summaries = _parallel(chunks, lambda chunk: cached_completion(
+            build_map_prompt(chunk), _parse_model(SectionSummary), "summary", store=store, span_name="llm.map",
+            limits=limits))
+    print(f"✅ Summarized {len(chunks)} chunks.")
+
+    level = 0
+    while sum(len(item.summary) for item in summaries) > OUTLINE_INPUT_CHARS and len(summaries) > 1:
+        level += 1
+        groups = [summaries[i:i + REDUCE_FANOUT] for i in range(0, len(summaries), REDUCE_FANOUT)]
+        with span("reduce", level=level, count=len(groups)):
+            summaries = _parallel(groups, lambda group: cached_completion(
+                build_reduce_prompt(group), _parse_model(SectionSummary), "summary", store=store,
+                span_name="llm.reduce", limits=limits))
+        print(f"✅ Reduce level {level}: {len(summaries)} summaries.")
+
+    with span("outline"):
+        outline = cached_completion(build_outline_prompt(summaries), _parse_model(Outline), "outline", store=store,
+                                    limits=limits)
+    print(f"✅ Outline with {len(outline.sections)} sections.")
+
+    done = []
+
+    def section(index):
+        result = cached_completion(build_section_prompt(outline, index, config),
+                                   lambda response: parse_chunk_response(response)[1], "slides",
+                                   store=store, span_name="llm.section", limits=limits)
+        done.append(index)
+        progress("chunks", len(done), len(outline.sections))
+        return result
+
+    with span("sections", count=len(outline.sections)):
+        results = _parallel(range(len(outline.sections)), section)
+    print("✅ Structured content generated.")
+    return results
+
 # API Integration Functions (Hypothetical Endpoints)
 # def submit_job(api_path, image_path, audio_path, head_name=None):
 #     with open(image_path, 'rb') as image_file, open(audio_path, 'rb') as audio_file:
@@ -143,6 +429,8 @@ def check_status(api_path: str, job_id: str) -> dict:
     """
     Poll the job-status endpoint and return the full status payload.
     """
+    import requests
+
     url = f"{api_path}/job-status/{job_id}"
     headers = {}
     resp = requests.get(url, headers=headers)
@@ -154,6 +442,8 @@ def download_video(api_path: str, job_id: str, save_path: str):
     """
     Download the completed video via streaming and save it locally.
     """
+    import requests
+
     url = f"{api_path}/download-video/{job_id}"
     headers = {}
     with requests.get(url, headers=headers, stream=True) as resp:
@@ -164,78 +454,535 @@ def download_video(api_path: str, job_id: str, save_path: str):
                     f.write(chunk)
     return save_path
 
-def main():
+INTRO_VOICE_OVER = "Hey folks! Welcome back to the channel. Today, we’re diving into something super cool — {topic}. Let’s get into it!"
+END_VOICE_OVER = "Thanks for hanging out with us! If you’re vibing with the content, hit that like button, share it with your crew, and smash that subscribe. Drop your thoughts or ideas in the comments — we love hearing from you!"
+
+SLIDES_PER_SHARD = int(os.getenv("SLIDES_PER_SHARD", "50"))
+
+def synthesize(script, audio_path, store=None, voice="en-GB-RyanNeural", rate="+20%", words_path=None):
+    """
+    generate_audio with the artifact store in front of it. The clip's word timings
+    are cached with it and, with words_path, written there as JSON (an empty list
+    when the TTS reported none). Returns True if the clip was synthesized now,
+    False if it came from the store.
+    """
+    cache_key = ArtifactStore.key("tts", script, voice, rate)
+    generated = not (store and store.get_file("audio", cache_key, audio_path))
+    if not generated:
+        words = store.get_json("words", cache_key)
+    else:
+        words = generate_audio(script, audio_path, voice=voice, rate=rate)
+        if store:
+            store.put_file("audio", cache_key, audio_path)
+            store.put_json("words", cache_key, words or [])
+    if words_path:
+        with open(words_path, "w", encoding="utf-8") as f:
+            json.dump(words or [], f, ensure_ascii=False)
+    return generated
+
+def narrate_language(language, scripts, durations, ckpt, limits, store=None):
+    """
+    Translate the narration scripts, synthesize them with the language's voice and
+    build one audio track fitted to the already-encoded segment durations.
+    Returns the track path and the clips it was built from. Every step is
+    checkpointed under languages/<language>/.
+    """
+    scripts_path = ckpt.path("languages", language, "scripts.json")
+    scripts_input = hash_inputs(scripts, language)
+    if ckpt.is_complete(f"translate:{language}", scripts_input):
+        with open(scripts_path, encoding="utf-8") as f:
+            translated = json.load(f)
+    else:
+        translated = translate_scripts(scripts, language, store=store, limits=limits)
+        with open(scripts_path, "w", encoding="utf-8") as f:
+            json.dump(translated, f, ensure_ascii=False, indent=4)
+        ckpt.save(f"translate:{language}", scripts_input, artifacts=[scripts_path])
+
+    voice = voice_for(language)
+    audio_paths = []
+    with span("audio", language=language, count=len(translated)):
+        for i, script in enumerate(translated):
+            audio_path = ckpt.path("languages", language, f"{i}_audio.mp3")
+            audio_input = hash_inputs(script, voice)
+            if not ckpt.is_complete(f"audio:{language}:{i}", audio_input):
+                with limits.tts:
+                    synthesize(script, audio_path, store=store, voice=voice)
+                ckpt.save(f"audio:{language}:{i}", audio_input, artifacts=[audio_path])
+            audio_paths.append(audio_path)
+
+    track_path = ckpt.path("languages", language, "narration.m4a")
+    track_input = hash_inputs([hash_file(path) for path in audio_paths], durations, AUDIO_ARGS)
+    if not ckpt.is_complete(f"track:{language}", track_input):
+        with limits.gate("audio"), span("audio.track", language=language) as track_span:
+            build_audio_track(audio_paths, durations, track_path, ckpt.path("languages", language, "fit"))
+            track_span.set(bytes_out=file_size(track_path))
+        ckpt.save(f"track:{language}", track_input, artifacts=[track_path])
+    return track_path, audio_paths
+
+def slide_shard_count(slide_count):
+    """
+    Decks above SLIDES_PER_SHARD slides are built and rasterized in parallel
+    shards, at most one per CPU.
+    """
+    return max(1, min(os.cpu_count() or 1, -(-slide_count // SLIDES_PER_SHARD)))
+
+# The config fields that change how slides look; voice, language and the like don't
+SLIDE_STYLE_FIELDS = {"theme", "resolution", "aspect_ratio"}
+
+def slides_visual_input(results, config):
+    """
+    Everything the rendered deck depends on: slide titles, text, key points and
+    theme colours plus the style config, but not the narration, so editing a
+    voice-over does not re-render the slides.
+    """
+    chunks = [{"slides": [slide.model_dump(include={"title", "content", "key_points"}) for slide in chunk.slides],
+               "theme_colors": chunk.theme_colors} for chunk in results]
+    return [chunks, config.model_dump(include=SLIDE_STYLE_FIELDS)]
+
+def render_slides(results, ppt_file, config, limits, store=None):
+    """
+    Build the deck and rasterize it, reusing rasters from the artifact store when
+    the same slides and style were rendered before (by any run).
+    Returns (topic, slide image paths).
+    """
+    slides_dir = os.path.dirname(ppt_file)
+    cache_key = ArtifactStore.key("slides", *slides_visual_input(results, config))
+    manifest = store.get_json("slides", cache_key) if store else None
+    if manifest:
+        slide_imgs = [os.path.join(slides_dir, f"slide_{i}.png") for i in range(manifest["count"])]
+        if all(store.get_file("raster", f"{cache_key}:{i}", path) for i, path in enumerate(slide_imgs)):
+            print("⏩ Reusing slide rasters from the artifact store.")
+            return manifest["topic"], slide_imgs
+
+    shards = slide_shard_count(sum(len(chunk.slides) for chunk in results))
+    if shards > 1:
+        with span("slides.pptx", shards=shards) as pptx_span:
+            topic, shard_decks = generate_sharded_presentation(results, ppt_file, shards)
+            deck_bytes = sum(file_size(path) for path, _ in shard_decks)
+            pptx_span.set(bytes_out=deck_bytes)
+        own_pool = None if limits.soffice_pool else SofficePool(len(shard_decks))
+        with span("slides.rasterize", shards=len(shard_decks)) as raster_span, own_pool or nullcontext():
+            slide_imgs = sharded_slides_to_images(
+                shard_decks, slides_dir,
+                soffice_pool=limits.soffice_pool or own_pool,
+                render_gate=limits.gate("soffice"),
+                rasterize=slides_to_images
+            )
+            raster_span.set(bytes_in=deck_bytes, bytes_out=sum(file_size(path) for path in slide_imgs))
+    else:
+        with span("slides.pptx") as pptx_span:
+            topic = generate_presentation(results, ppt_file, config)
+            pptx_span.set(bytes_out=file_size(ppt_file))
+        with limits.gate("soffice"), limits.soffice_profile() as profile, span("slides.rasterize") as raster_span:
+            slide_imgs = slides_to_images(ppt_file, slides_dir, soffice_profile=profile)
+            raster_span.set(bytes_in=file_size(ppt_file), bytes_out=sum(file_size(path) for path in slide_imgs))
+    if store:
+        for i, path in enumerate(slide_imgs):
+            store.put_file("raster", f"{cache_key}:{i}", path)
+        store.put_json("slides", cache_key, {"topic": topic, "count": len(slide_imgs)})
+    return topic, slide_imgs
+
+def render_transition(image_a, image_b, transition_path, kind, seconds, store=None):
+    """
+    encode_transition with the artifact store in front of it.
+    """
+    cache_key = ArtifactStore.key(transition_input_hash(image_a, image_b, kind, seconds))
+    if store and store.get_file("segment", cache_key, transition_path):
+        return transition_path
+    encode_transition(image_a, image_b, transition_path, kind, seconds)
+    if store:
+        store.put_file("segment", cache_key, transition_path)
+    return transition_path
+
+def encode_segment(slide_img, audio_path, segment_path, presenter_path=None, store=None, duration=None,
+                   subtitles_path=None):
+    """
+    encode_still_segment with the artifact store in front of it, keyed by the
+    hashes of the segment's inputs and the encoder settings.
+    """
+    cache_key = ArtifactStore.key(
+        hash_file(slide_img), hash_file(audio_path),
+        hash_file(presenter_path) if presenter_path else None,
+        VIDEO_ARGS, AUDIO_ARGS,
+        *([round(duration, 3)] if duration else []),
+        *([hash_file(subtitles_path)] if subtitles_path else [])
+    )
+    if store and store.get_file("segment", cache_key, segment_path):
+        return segment_path
+    encode_still_segment(slide_img, audio_path, segment_path, presenter_video_path=presenter_path, duration=duration,
+                         subtitles_path=subtitles_path)
+    if store:
+        store.put_file("segment", cache_key, segment_path)
+    return segment_path
+
+def run_pipeline(pdf_path, config=None, output_dir="Output", run_id=None, resume=False, limits=None, store=None, progress=None,
+                 presenter_api=None, avatar_path=None, languages=None, audio_tracks="streams", shorts=False,
+                 dedup_threshold=DEDUP_THRESHOLD, map_reduce=False, burn_subtitles=False):
+    """
+    Run the full PDF -> video pipeline with a checkpoint after every stage.
+
+    With resume=True, stages whose inputs and artifacts are unchanged since the last
+    run with the same run ID are loaded from Output/runs/<run_id>/ instead of being
+    recomputed, so a crash in the final encode does not repeat LLM or TTS calls.
+
+    limits and store let a batch share stage concurrency limits, LibreOffice
+    profiles and the artifact store (LLM results, slide rasters, audio, segments)
+    across documents (see batch.py). Without a store, one is opened at
+    $ARTIFACT_STORE_DIR, or Output/store.
+
+    progress, if given, is called as progress(stage, done, total) as work completes;
+    the job service uses it to report per-stage progress.
+
+    presenter_api and avatar_path enable the presenter-avatar overlay: one avatar
+    job per slide is run through presenter_client, all jobs in flight at once.
+
+    languages adds narration in further languages (e.g. ["es", "fr"]) on top of the
+    same rendered segments: only the scripts are translated and re-synthesized.
+    audio_tracks="streams" adds them as extra audio streams of final_video.mp4,
+    "files" writes one final_video.<language>.mp4 per language instead.
+
+    shorts=True also renders the 9:16 shorts into <output_dir>/shorts in the same
+    run, from the slide rasters, TTS cache and encoder limits of the main video.
+
+    dedup_threshold is the shingle similarity above which slides (and shorts) from
+    different chunks count as duplicates and are merged; 0 or None disables it.
+
+    map_reduce=True generates the deck through generate_map_reduce_content
+    (parallel chunk summaries, a global outline, slides per section) instead of
+    one full-deck prompt per 100k-character chunk; meant for book-length PDFs.
+
+    Captions from the TTS word timings are always written as final_video.srt and
+    .vtt sidecars (and next to each short); burn_subtitles=True also burns them
+    into the video during the segment encodes.
+    """
+    config = config or VideoConfig()
+    limits = limits or StageLimits(governor=default_governor())
+    os.makedirs(output_dir, exist_ok=True)
+    store = store or ArtifactStore(os.getenv("ARTIFACT_STORE_DIR", os.path.join(output_dir, "store")))
+    progress = progress or (lambda stage, done, total: None)
+    pdf_hash = hash_file(pdf_path)
+    run_id = run_id or make_run_id(pdf_hash, config)
+    ckpt = RunCheckpoint(output_dir, run_id, resume=resume)
+    print(f"Run ID: {run_id}{' (resuming)' if resume else ''}")
+
+    # Spans for every stage end up in the run directory as JSON lines and as a
+    # Chrome trace (open trace.json in chrome://tracing or ui.perfetto.dev)
+    tracer = Tracer(run_id)
+    # Per-route latency, failure and cache counters of this run's LLM calls only
+    with collect_route_stats() as run_route_stats:
+        try:
+            with tracer.activate(), span("run", run_id=run_id, bytes_in=file_size(pdf_path)):
+                return _run_stages(pdf_path, pdf_hash, config, output_dir, ckpt, limits, store, progress,
+                                   presenter_api, avatar_path, languages or [], audio_tracks, shorts,
+                                   dedup_threshold, map_reduce, burn_subtitles)
+        finally:
+            with open(ckpt.path("routes.json"), "w", encoding="utf-8") as f:
+                json.dump(run_route_stats.snapshot(), f, indent=4)
+            tracer.export_jsonl(ckpt.path("trace.jsonl"))
+            tracer.export_chrome_trace(ckpt.path("trace.json"))
+            print(tracer.summary())
+
+def _run_stages(pdf_path, pdf_hash, config, output_dir, ckpt, limits, store, progress, presenter_api, avatar_path,
+                languages, audio_tracks, shorts, dedup_threshold, map_reduce, burn_subtitles):
+    # Stage 1: extracted text
+    text_path = ckpt.path("text.txt")
+    if ckpt.is_complete("text", pdf_hash):
+        with open(text_path, encoding="utf-8") as f:
+            text = f.read()
+        print("⏩ Reusing extracted text.")
+    else:
+        with span("extract", bytes_in=file_size(pdf_path)) as extract_span:
+            text = extract_text_from_pdf(pdf_path)
+            extract_span.set(bytes_out=len(text.encode("utf-8")))
+        with open(text_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        ckpt.save("text", pdf_hash, artifacts=[text_path])
+    progress("text", 1, 1)
+
+    # Stage 2: chunk results
+    results_path = ckpt.path("chunk_results.json")
+    results_input = hash_inputs(hash_text(text), config.model_dump(), *(["map_reduce"] if map_reduce else []))
+    if ckpt.is_edited("chunks", results_input):
+        # chunk_results.json was edited by hand since the last run: keep the edits,
+        # later stages only redo the slides and narration that changed
+        with open(results_path, encoding="utf-8") as f:
+            results = [SlideChunk(**chunk) for chunk in json.load(f)]
+        ckpt.save("chunks", results_input, artifacts=[results_path])
+        print("✏️ Using edited chunk results.")
+    elif ckpt.is_complete("chunks", results_input):
+        with open(results_path, encoding="utf-8") as f:
+            results = [SlideChunk(**chunk) for chunk in json.load(f)]
+        print("⏩ Reusing chunk results.")
+    elif map_reduce:
+        results = generate_map_reduce_content(text, config, limits=limits, store=store, progress=progress)
+        with open(results_path, "w", encoding="utf-8") as f:
+            json.dump([chunk.model_dump() for chunk in results], f, ensure_ascii=False, indent=4)
+        ckpt.save("chunks", results_input, artifacts=[results_path])
+    else:
+        chunks = chunk_text(text)
+        results = []
+        with span("chunks", count=len(chunks)):
+            for chunk in chunks:
+                results.append(generate_chunk_content(chunk, config, store=store, limits=limits))
+                progress("chunks", len(results), len(chunks))
+        with open(results_path, "w", encoding="utf-8") as f:
+            json.dump([chunk.model_dump() for chunk in results], f, ensure_ascii=False, indent=4)
+        ckpt.save("chunks", results_input, artifacts=[results_path])
+    progress("chunks", len(results), len(results))
+
+    # Near-duplicate slides and shorts (repeated across chunk boundaries) are
+    # merged before anything is rendered or synthesized
+    if dedup_threshold:
+        with span("dedup") as dedup_span:
+            results, dedup_report = dedup_results(results, threshold=dedup_threshold)
+            dedup_span.set(dropped=dedup_report["slides_in"] - dedup_report["slides_out"])
+        with open(ckpt.path("dedup_report.json"), "w", encoding="utf-8") as f:
+            json.dump(dedup_report, f, ensure_ascii=False, indent=4)
+        if dedup_report["merged"]:
+            print(f"✅ Merged {len(dedup_report['merged'])} near-duplicate slides.")
+
+    # Intro, one entry per generated slide, outro -- matching the title and final slides.
+    # The topic is the deck's title, so it is known before the deck is built
+    all_slides, _ = resolve_slide_contents(results)
+    topic = presentation_title_for(all_slides)
+    scripts = [INTRO_VOICE_OVER.format(topic=topic)] + [slide.voice_over for slide in all_slides] + [END_VOICE_OVER]
+
+    # Predicted timeline from the calibrated narration rate, written before any
+    # audio exists and reconciled with the real durations once it does
+    estimator = NarrationEstimator(store)
+    style = transition_style(config.animation_level)
+    gap = style[1] if style else 0.0
+    timeline = plan_timeline(scripts, estimator, gap=gap)
+    with open(ckpt.path("timeline.json"), "w", encoding="utf-8") as f:
+        json.dump({"status": "predicted", "calibrated": estimator.calibrated, "segments": timeline}, f, indent=4)
+
+    # Stage 4: audio with durations, synthesized while the slides render
+    def narrate():
+        audio_paths, durations = [], []
+        with span("audio", count=len(scripts)):
+            for i, script in enumerate(scripts):
+                audio_path = ckpt.path("audio", f"{i}_audio.mp3")
+                words_path = ckpt.path("audio", f"{i}_words.json")
+                audio_input = hash_inputs(script)
+                if ckpt.is_complete(f"audio:{i}", audio_input):
+                    duration = ckpt.load(f"audio:{i}")["duration"]
+                else:
+                    with limits.tts:
+                        generated = synthesize(script, audio_path, store=store, words_path=words_path)
+                    duration = probe_duration(audio_path)
+                    if generated:
+                        # Clips reused from the store were already counted when first made
+                        estimator.observe(script, duration)
+                    ckpt.save(f"audio:{i}", audio_input, data={"duration": duration},
+                              artifacts=[audio_path, words_path])
+                audio_paths.append(audio_path)
+                durations.append(duration)
+                progress("audio", i + 1, len(scripts))
+        return audio_paths, durations
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        narration = submit_in_context(pool, narrate)
+
+        # Stage 3: rendered slides
+        ppt_file = ckpt.path("slides", "presentation.pptx")
+        slides_input = hash_inputs(*slides_visual_input(results, config))
+        if ckpt.is_complete("slides", slides_input):
+            slide_imgs = [path for path in ckpt.artifacts("slides") if path.endswith(".png")]
+            print("⏩ Reusing rendered slides.")
+        else:
+            with span("slides"):
+                _, slide_imgs = render_slides(results, ppt_file, config, limits, store=store)
+            ckpt.save("slides", slides_input, data={"topic": topic}, artifacts=slide_imgs)
+        progress("slides", 1, 1)
+
+        audio_paths, durations = narration.result()
+    print("✅ Audio ready.")
+
+    estimator.save()
+    timeline, timeline_summary = reconcile_timeline(timeline, durations, gap=gap)
+    with open(ckpt.path("timeline.json"), "w", encoding="utf-8") as f:
+        json.dump({"status": "reconciled", "calibrated": estimator.calibrated, **timeline_summary,
+                   "segments": timeline}, f, indent=4)
+
+    # Captions from the word timings reported during synthesis (estimated for clips
+    # without any), one cue list per clip; shifted onto the timeline for the sidecars
+    clip_cues = [build_cues(load_word_timings(ckpt.path("audio", f"{i}_words.json"), script, duration), end=duration)
+                 for i, (script, duration) in enumerate(zip(scripts, durations))]
+    subtitle_paths = [None] * len(clip_cues)
+    if burn_subtitles:
+        subtitle_paths = [write_srt(cues, ckpt.path("captions", f"segment_{i:04d}.srt"))
+                          for i, cues in enumerate(clip_cues)]
+
+    # Optional presenter-avatar videos, one per narration clip
+    presenter_paths = [None] * len(audio_paths)
+    if presenter_api and avatar_path:
+        presenter_input = hash_inputs(hash_file(avatar_path), [hash_file(path) for path in audio_paths])
+        if ckpt.is_complete("presenter", presenter_input):
+            presenter_paths = ckpt.load("presenter")["videos"]
+            print("⏩ Reusing presenter videos.")
+        else:
+            from presenter_client import generate_presenter_videos
+
+            with span("presenter", count=len(audio_paths)):
+                presenter_paths = generate_presenter_videos(presenter_api, avatar_path, audio_paths, ckpt.path("presenter"))
+            ckpt.save("presenter", presenter_input, data={"videos": presenter_paths},
+                      artifacts=[path for path in presenter_paths if path])
+
+    # Stage 5: encoded segments. The edit-decision list records each segment's
+    # input hash, so a re-render (with or without --resume) only re-encodes the
+    # segments whose slide image or narration changed
+    edl = EditDecisionList(ckpt.path("edl.json"))
+    segment_paths = []
+    with span("segments", count=len(slide_imgs)):
+        for i, (slide_img, audio_path, presenter_path, subtitles_path) in enumerate(
+                zip(slide_imgs, audio_paths, presenter_paths, subtitle_paths)):
+            segment_path = ckpt.path("segments", f"segment_{i:04d}.mp4")
+            segment_input = segment_input_hash(slide_img, audio_path, presenter_path, subtitles_path=subtitles_path)
+            current = edl.is_current(i, segment_input, segment_path)
+            if not (current or ckpt.is_complete(f"segment:{i}", segment_input)):
+                with limits.render, span("encode.segment", index=i) as encode_span:
+                    encode_segment(slide_img, audio_path, segment_path, presenter_path, store=store,
+                                   subtitles_path=subtitles_path)
+                    encode_span.set(bytes_in=file_size(slide_img) + file_size(audio_path), bytes_out=file_size(segment_path))
+                ckpt.save(f"segment:{i}", segment_input, artifacts=[segment_path])
+            if not current:
+                edl.record(i, slide_img, audio_path, segment_path, segment_input, presenter_video_path=presenter_path,
+                           subtitles_path=subtitles_path, script=scripts[i],
+                           words_path=ckpt.path("audio", f"{i}_words.json"))
+            segment_paths.append(segment_path)
+            progress("segments", i + 1, len(slide_imgs))
+    print("✅ Segments encoded.")
+
+    # Transitions between adjacent slides (VideoConfig.animation_level): only the
+    # transition windows are rendered, as short segments of their own
+    kept = set()
+    if style:
+        kind, seconds = style
+        with span("transitions", kind=kind, count=len(segment_paths) - 1):
+            for i in range(len(segment_paths) - 1):
+                transition_path = ckpt.path("transitions", f"transition_{i:04d}.mp4")
+                transition_input = transition_input_hash(slide_imgs[i], slide_imgs[i + 1], kind, seconds)
+                current = edl.is_transition_current(i, transition_input, transition_path)
+                if not (current or ckpt.is_complete(f"transition:{i}", transition_input)):
+                    with limits.render, span("encode.transition", index=i) as encode_span:
+                        render_transition(slide_imgs[i], slide_imgs[i + 1], transition_path, kind, seconds, store=store)
+                        encode_span.set(bytes_out=file_size(transition_path))
+                    ckpt.save(f"transition:{i}", transition_input, artifacts=[transition_path])
+                if not current:
+                    edl.record_transition(i, slide_imgs[i], slide_imgs[i + 1], kind, seconds, transition_path,
+                                          transition_input)
+                kept.add(i)
+        print(f"✅ {len(kept)} {kind} transitions encoded.")
+    edl.prune_transitions(kept)
+
+    # Final container: stills and transitions joined by stream copy
+    output_path = os.path.join(output_dir, "final_video.mp4")
+    edl.save(output_path, count=len(segment_paths))
+    with span("final.concat") as concat_span:
+        concat_segments(edl.paths(), output_path)
+        concat_span.set(bytes_out=file_size(output_path))
+    write_sidecars([cue for entry, cues in zip(edl.segments, clip_cues) for cue in shift_cues(cues, entry["start"])],
+                   output_path)
+    print("✅ Main Video exported")
+
+    # Further narration languages over the same segments
+    languages = [language for language in languages if language != config.language]
+    if not languages and edl.audio_tracks:
+        edl.audio_tracks = None
+        edl.save()
+    if languages:
+        with span("languages", count=len(languages)):
+            # Each clip is fitted to its segment plus the transition after it
+            durations = edl.slot_durations()
+            narrations = [narrate_language(language, scripts, durations, ckpt, limits, store) for language in languages]
+            tracks = [(track_path, iso639_2(language)) for language, (track_path, _) in zip(languages, narrations)]
+            if audio_tracks == "files":
+                for language, track in zip(languages, tracks):
+                    mux_audio_tracks(output_path, [track], os.path.join(output_dir, f"final_video.{language}.mp4"))
+            else:
+                muxed_path = output_path + ".multi.mp4"
+                mux_audio_tracks(output_path, tracks, muxed_path, original_language=iso639_2(config.language))
+                os.replace(muxed_path, output_path)
+            # Recorded so that rerender can refit and re-mux them after an edit
+            edl.record_audio_tracks(audio_tracks, [
+                {"code": language, "language": iso639_2(language), "track": track_path, "clips": clips,
+                 "durations": durations}
+                for language, (track_path, clips) in zip(languages, narrations)
+            ], original_language=iso639_2(config.language))
+            edl.save()
+        print(f"✅ Narration added in {', '.join(language_name(language) for language in languages)}")
+
+    # 9:16 shorts from the same slide rasters and audio cache
+    if shorts:
+        from yt_shorts import render_shorts
+
+        with span("shorts"):
+            short_paths = render_shorts(results, slide_imgs, output_dir, ckpt=ckpt, limits=limits, store=store,
+                                        burn_subtitles=burn_subtitles)
+        print(f"✅ {len(short_paths)} YouTube Shorts generated")
+    progress("final", 1, 1)
+    return output_path
+
+def plan_run(pdf_path, config=None, output_dir="Output"):
+    """
+    Dry run: extract and chunk the PDF, then lay out the timeline from chunk results
+    already in the artifact store. Makes no LLM or TTS calls and never imports the
+    video libraries. Chunks without a cached result are listed as pending.
+    """
+    config = config or VideoConfig()
+    run_id = make_run_id(hash_file(pdf_path), config)
+    text = extract_text_from_pdf(pdf_path)
+    chunks = chunk_text(text)
+
+    store_dir = os.getenv("ARTIFACT_STORE_DIR", os.path.join(output_dir, "store"))
+    store = ArtifactStore(store_dir) if os.path.isdir(store_dir) else None
+
+    plan = {"run_id": run_id, "chars": len(text), "chunks": [], "timeline": []}
+    results = []
+    for i, chunk in enumerate(chunks):
+        cache_key = ArtifactStore.key("chat", route("slides").model, build_chunk_prompt(chunk, config))
+        response = store.get_json("llm", cache_key) if store else None
+        entry = {"index": i, "chars": len(chunk), "status": "cached" if response else "pending"}
+        if response:
+            _, result = parse_chunk_response(response)
+            entry["slides"] = len(result.slides)
+            results.append(result)
+        plan["chunks"].append(entry)
+    results, dedup_report = dedup_results(results)
+    plan["duplicates_merged"] = len(dedup_report["merged"])
+
+    slides = [slide for result in results for slide in result.slides]
+    scripts = [INTRO_VOICE_OVER.format(topic=presentation_title_for(slides))]
+    scripts += [slide.voice_over for slide in slides] + [END_VOICE_OVER]
+    titles = ["Intro"] + [slide.title for slide in slides] + ["Outro"]
+
+    estimator = NarrationEstimator(store)
+    style = transition_style(config.animation_level)
+    plan["timeline"] = plan_timeline(scripts, estimator, titles=titles, gap=style[1] if style else 0.0)
+    plan["estimated_duration_s"] = round(timeline_length(plan["timeline"]), 2)
+    plan["calibrated"] = estimator.calibrated
+    plan["complete"] = all(entry["status"] == "cached" for entry in plan["chunks"])
+    return plan
+
+def main(resume=False, run_id=None):
     args = Args()
     config = VideoConfig(
         theme=args.theme,
         language=args.language,
         voice_style=args.voice,
+        animation_level=args.animation,
         include_background_music=bool(args.music)
     )
-    text = extract_text_from_pdf(args.pdf_path)
-    chunks = chunk_text(text)
-    results = [generate_chunk_content(chunk, config) for chunk in chunks]
-
-    # Flatten all slides from all chunks
-    all_slides = [slide for result in results for slide in result.slides]
-
-    # Generate presentation and slide images
-    ppt_file = "presentation.pptx"
-    generate_presentation(results, ppt_file, config)
-    with tempfile.TemporaryDirectory() as tmpdir:
-        slide_imgs = slides_to_images(ppt_file, tmpdir)
-
-        jobs = []
-        # for slide in all_slides:
-        #     job_id = submit_job(args.api_path, args.avatar, slide.voice_over)
-        #     jobs.append({"job_id": job_id, "slide": slide, "status": "processing", "video_path": None})
-
-        # # Poll for job statuses
-        # while any(job["status"] != "completed" for job in jobs):
-        #     for job in jobs:
-        #         if job["status"] == "processing":
-        #             status = check_status(args.api_path, job["job_id"])
-        #             if status == "completed":
-        #                 video_path = os.path.join(tmpdir, f"presenter_{job['slide'].title}.mp4")
-        #                 download_video(args.api_path, job["job_id"], video_path)
-        #                 job["video_path"] = video_path
-        #                 job["status"] = "processed"
-        #             elif status == "failed":
-        #                 print(f"Job {job['job_id']} failed")
-        #                 job["status"] = "failed"
-        #     time.sleep(60)
-
-        # Create video clips
-        clips = []
-        for i, slide in enumerate(all_slides):
-            slide_img = slide_imgs[i]
-            audio_path = f"{i}_audio.mp3"
-            generate_audio(slide.voice_over,audio_path)
-            audio = AudioFileClip(audio_path)
-
-            # presenter_video_path = next(job["video_path"] for job in jobs if job["slide"] == slide)
-            # presenter_clip = VideoFileClip(presenter_video_path)
-            image_clip = ImageClip(slide_img).set_duration(audio.duration)
-            # presenter_clip = presenter_clip.resize(height=image_clip.h // 2)
-            # presenter_clip = presenter_clip.set_position(("right", "bottom"))
-            #final_clip = CompositeVideoClip([image_clip, presenter_clip]).set_audio(presenter_clip.audio)
-            final_clip = CompositeVideoClip([image_clip]).set_audio(audio)
-            clips.append(final_clip)
-
-        # Concatenate all clips
-        final_video = concatenate_videoclips(clips, method="compose")
-        final_video.write_videofile("final_video.mp4", fps=24)
-        print("✅ Main Video exported")
-
-        # # Generate YouTube Shorts
-        # shorts_config = VideoConfig(
-        #     theme=config.theme,
-        #     language=config.language,
-        #     voice_style=config.voice_style,
-        #     aspect_ratio="9:16"
-        # )
-        # process_shorts_from_results(results, shorts_config)
-        # print("✅ YouTube Shorts generated")
+    run_pipeline(
+        args.pdf_path, config,
+        output_dir=args.output,
+        run_id=run_id,
+        resume=resume,
+        presenter_api=args.api_path or None,
+        avatar_path=args.avatar if args.api_path else None
+    )
 
 class Args:
     pdf_path = 'contents/Basics_of_Machine_Learning_Notes.pdf'
@@ -244,8 +991,10 @@ class Args:
     theme = 'creative'
     language = 'en'
     voice = 'enthusiastic'
-    output = '/content/output/'
+    animation = 'moderate'
+    output = 'Output'
     api_path = ''
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    from cli import main as cli_main
+    cli_main()
@@ -1,29 +1,24 @@
-from pptx import Presentation
-from pptx.util import Pt, Inches
-from pptx.dml.color import RGBColor
+import multiprocessing
 import subprocess
 import os
-from pdf2image import convert_from_path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
 
-def generate_presentation(slide_contents, pptx_path, config=None):
+DEFAULT_THEME_COLORS = {
+    "primary": "#1F497D",
+    "secondary": "#4F81BD",
+    "accent": "#C0504D",
+    "background": "#FFFFFF",
+    "text": "#000000"
+}
+
+def resolve_slide_contents(slide_contents):
     """
-    Generate a PowerPoint presentation from slide contents, which can be:
+    Normalise the accepted input formats into (slides, theme_colors):
     1. A list of SlideItem objects
     2. A SlideChunk object
-    3. The raw parsed content from the paste.txt
-    
-    Parameters:
-    - slide_contents: Slide content in one of the above formats
-    - pptx_path: Path where the presentation will be saved
-    - config: Optional configuration parameters
-    
-    Returns:
-    - Path to the saved presentation
+    3. A list of SlideChunk objects (slides from every chunk, theme from the first)
     """
-    print("Creating enhanced slides...")
-    prs = Presentation()
-    
-    # Handle different possible input formats
     if hasattr(slide_contents, 'slides'):
         # This is a SlideChunk object
         slides = slide_contents.slides
@@ -35,38 +30,30 @@ def generate_presentation(slide_contents, pptx_path, config=None):
         theme_colors = {}
 
     elif isinstance(slide_contents, list) and len(slide_contents) > 0 and 'slides' in dir(slide_contents[0]):
-        # This might be a list containing one SlideChunk object
-        slides = slide_contents[0].slides
+        # A list of SlideChunk objects
+        slides = [slide for chunk in slide_contents for slide in chunk.slides]
         theme_colors = slide_contents[0].theme_colors if slide_contents[0].theme_colors else {}
 
     else:
         slides = slide_contents
         theme_colors = {}
-        
+
         if hasattr(slide_contents, 'theme_colors'):
             theme_colors = slide_contents.theme_colors
-    
-    # Ensure we have default theme colors if not provided
-    if not theme_colors:
-        theme_colors = {
-            "primary": "#1F497D",
-            "secondary": "#4F81BD", 
-            "accent": "#C0504D",
-            "background": "#FFFFFF",
-            "text": "#000000"
-        }
-    
-    # Strip '#' prefix from colors if present
+
+    # Ensure we have default theme colors if not provided, and strip '#' prefixes
+    theme_colors = dict(theme_colors or DEFAULT_THEME_COLORS)
+    for key, value in DEFAULT_THEME_COLORS.items():
+        theme_colors.setdefault(key, value)
     for key in theme_colors:
         if isinstance(theme_colors[key], str) and theme_colors[key].startswith('#'):
             theme_colors[key] = theme_colors[key][1:]
-    
-    # Add a title slide
-    title_slide = prs.slides.add_slide(prs.slide_layouts[0])
-    title = title_slide.shapes.title
-    subtitle = title_slide.placeholders[1]
-    
-    # Determine presentation title from first slide
+    return slides, theme_colors
+
+def presentation_title_for(slides):
+    """
+    Determine presentation title from first slide
+    """
     presentation_title = "Presentation"
     if slides and hasattr(slides[0], 'title'):
         first_title = slides[0].title
@@ -74,86 +61,201 @@ def generate_presentation(slide_contents, pptx_path, config=None):
             presentation_title = first_title.split("to")[1].strip()
         else:
             presentation_title = first_title
-    
-    title.text = presentation_title
-    subtitle.text = "A Comprehensive Guide"
-    content_about = title.text
-    
-    # Style the title slide
-    title.text_frame.paragraphs[0].font.size = Pt(44)
-    title.text_frame.paragraphs[0].font.color.rgb = RGBColor.from_string(theme_colors["primary"])
-    subtitle.text_frame.paragraphs[0].font.size = Pt(28)
-    subtitle.text_frame.paragraphs[0].font.color.rgb = RGBColor.from_string(theme_colors["secondary"])
-    
+    return presentation_title
+
+def build_styles(theme_colors):
+    """
+    Font specs (size, RGBColor) for every text role, parsed once per deck instead
+    of once per paragraph.
+    """
+    from pptx.util import Pt
+    from pptx.dml.color import RGBColor
+
+    colors = {key: RGBColor.from_string(value) for key, value in theme_colors.items()
+              if isinstance(value, str) and len(value) == 6}
+    return {
+        "title": (Pt(44), colors["primary"]),
+        "subtitle": (Pt(28), colors["secondary"]),
+        "slide_title": (Pt(36), colors["primary"]),
+        "content": (Pt(24), colors["text"]),
+        "bullet": (Pt(20), colors["secondary"]),
+        "final_title": (Pt(40), colors["primary"]),
+        "final_text": (Pt(32), colors["accent"]),
+    }
+
+def _style(font, spec):
+    font.size, font.color.rgb = spec
+
+def build_deck(slides, pptx_path, theme_colors, presentation_title=None, include_final=False, first_number=1):
+    """
+    Build and save one .pptx: an optional title slide, one slide per SlideItem,
+    and an optional closing slide. Used for whole decks and for shards of a deck.
+    """
+    from pptx import Presentation
+
+    styles = build_styles(theme_colors)
+    prs = Presentation()
+
+    if presentation_title is not None:
+        # Add a title slide
+        title_slide = prs.slides.add_slide(prs.slide_layouts[0])
+        title = title_slide.shapes.title
+        subtitle = title_slide.placeholders[1]
+        title.text = presentation_title
+        subtitle.text = "A Comprehensive Guide"
+        _style(title.text_frame.paragraphs[0].font, styles["title"])
+        _style(subtitle.text_frame.paragraphs[0].font, styles["subtitle"])
+
     # Process each slide
     for i, slide_item in enumerate(slides):
         slide = prs.slides.add_slide(prs.slide_layouts[1])
         title_shape = slide.shapes.title
         content_placeholder = slide.placeholders[1]
-        
-        # Get slide title
-        slide_title = f"Slide {i+1}"
-        if hasattr(slide_item, 'title'):
-            slide_title = slide_item.title
-        
+
         # Set the title
-        title_shape.text = slide_title
-        title_shape.text_frame.paragraphs[0].font.size = Pt(36)
-        title_shape.text_frame.paragraphs[0].font.color.rgb = RGBColor.from_string(theme_colors["primary"])
-        
+        title_shape.text = getattr(slide_item, 'title', f"Slide {first_number + i}")
+        _style(title_shape.text_frame.paragraphs[0].font, styles["slide_title"])
+
         # Set the content
         content_frame = content_placeholder.text_frame
         content_frame.clear()
-        
-        # Add main content
-        slide_content = "Content"
-        if hasattr(slide_item, 'content'):
-            slide_content = slide_item.content
-            
+
         p = content_frame.add_paragraph()
-        p.text = slide_content
-        p.font.size = Pt(24)
-        p.font.color.rgb = RGBColor.from_string(theme_colors["text"])
-        
+        p.text = getattr(slide_item, 'content', "Content")
+        _style(p.font, styles["content"])
+
         # Add key points as bullets
-        key_points = []
-        if hasattr(slide_item, 'key_points'):
-            key_points = slide_item.key_points
-            
+        key_points = getattr(slide_item, 'key_points', [])
         if key_points:
             content_frame.add_paragraph().text = ""  # Add spacing
             for point in key_points:
                 bullet_p = content_frame.add_paragraph()
                 bullet_p.text = point
-                bullet_p.font.size = Pt(20)
                 bullet_p.level = 1
-                bullet_p.font.color.rgb = RGBColor.from_string(theme_colors["secondary"])
-    
-   
-    
-    # Add a final slide
-    final_slide = prs.slides.add_slide(prs.slide_layouts[2])
-    final_title = final_slide.shapes.title
-    final_content = final_slide.placeholders[1]
-    
-    final_title.text = "Thank You!"
-    final_title.text_frame.paragraphs[0].font.size = Pt(40)
-    final_title.text_frame.paragraphs[0].font.color.rgb = RGBColor.from_string(theme_colors["primary"])
-    
-    final_p = final_content.text_frame.add_paragraph()
-    final_p.text = "Please Like, Share And Subscribe?"
-    final_p.font.size = Pt(32)
-    final_p.font.color.rgb = RGBColor.from_string(theme_colors["accent"])
-    
-    # Save the presentation
+                _style(bullet_p.font, styles["bullet"])
+
+    if include_final:
+        # Add a final slide
+        final_slide = prs.slides.add_slide(prs.slide_layouts[2])
+        final_title = final_slide.shapes.title
+        final_content = final_slide.placeholders[1]
+
+        final_title.text = "Thank You!"
+        _style(final_title.text_frame.paragraphs[0].font, styles["final_title"])
+
+        final_p = final_content.text_frame.add_paragraph()
+        final_p.text = "Please Like, Share And Subscribe?"
+        _style(final_p.font, styles["final_text"])
+
     prs.save(pptx_path)
+    return pptx_path
+
+def generate_presentation(slide_contents, pptx_path, config=None):
+    """
+    Generate a PowerPoint presentation from slide contents (see resolve_slide_contents
+    for the accepted formats).
+
+    Parameters:
+    - slide_contents: Slide content in one of the accepted formats
+    - pptx_path: Path where the presentation will be saved
+    - config: Optional configuration parameters
+
+    Returns:
+    - The presentation title (the topic used in the intro narration)
+    """
+    print("Creating enhanced slides...")
+    slides, theme_colors = resolve_slide_contents(slide_contents)
+    content_about = presentation_title_for(slides)
+    build_deck(slides, pptx_path, theme_colors, presentation_title=content_about, include_final=True)
     print(f"✅ Enhanced slides created and saved to {pptx_path}")
     return content_about
 
-def slides_to_images(ppt_path, output_folder):
-    subprocess.run([
-        '/Applications/LibreOffice.app/Contents/MacOS/soffice', '--headless', '--convert-to', 'pdf', ppt_path, '--outdir', output_folder
-    ], check=True)
-    pdf_path = os.path.join(output_folder, os.path.splitext(os.path.basename(ppt_path))[0] + ".pdf")
-    return [img.save(os.path.join(output_folder, f"slide_{i}.png"), 'PNG') or os.path.join(output_folder, f"slide_{i}.png")
-            for i, img in enumerate(convert_from_path(pdf_path, dpi=200))]
+def generate_sharded_presentation(slide_contents, pptx_path, shards, max_workers=None):
+    """
+    Build the same deck as generate_presentation, split into `shards` contiguous
+    sub-decks (<name>_part<k>.pptx) that are built in parallel processes. The
+    first shard carries the title slide and the last one the closing slide.
+
+    Returns (presentation title, [(shard path, first global slide index), ...]).
+    """
+    print(f"Creating enhanced slides in {shards} shards...")
+    slides, theme_colors = resolve_slide_contents(slide_contents)
+    content_about = presentation_title_for(slides)
+    shards = max(1, min(shards, len(slides)))
+    base, ext = os.path.splitext(pptx_path)
+    size, extra = divmod(len(slides), shards)
+
+    jobs, start = [], 0
+    for k in range(shards):
+        end = start + size + (1 if k < extra else 0)
+        jobs.append(dict(
+            slides=slides[start:end],
+            pptx_path=f"{base}_part{k}{ext}",
+            theme_colors=theme_colors,
+            presentation_title=content_about if k == 0 else None,
+            include_final=k == shards - 1,
+            first_number=start + 1,
+        ))
+        start = end
+
+    # Spawned, not forked: this is called from batch and job-server worker threads,
+    # and a forked child can inherit a lock another thread held at fork time
+    with ProcessPoolExecutor(max_workers=max_workers or shards, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(build_deck, **job) for job in jobs]
+        paths = [future.result() for future in futures]
+
+    # Global index of each shard's first slide: the title slide occupies index 0
+    offsets, index = [], 0
+    for job in jobs:
+        offsets.append(index)
+        index += len(job["slides"]) + (job["presentation_title"] is not None) + job["include_final"]
+    print(f"✅ Enhanced slides created in {len(paths)} shards next to {pptx_path}")
+    return content_about, list(zip(paths, offsets))
+
+SOFFICE_BINARY = os.getenv("SOFFICE_PATH", '/Applications/LibreOffice.app/Contents/MacOS/soffice')
+
+def slides_to_images(ppt_path, output_folder, soffice_profile=None, start_index=0):
+    """
+    Convert a .pptx to one PNG per slide via LibreOffice and pdf2image.
+
+    soffice_profile: optional LibreOffice user-profile URL, required when several
+    conversions run at the same time (see workers.SofficePool).
+    start_index: number of the first image, so shards of one deck can be written
+    into the same folder in global slide order (slide_<n>.png).
+    """
+    from pdf2image import convert_from_path
+    from workers import default_governor
+
+    command = [SOFFICE_BINARY, '--headless']
+    if soffice_profile:
+        command.append(f'-env:UserInstallation={soffice_profile}')
+    stem = os.path.splitext(os.path.basename(ppt_path))[0]
+    pdf_path = os.path.join(output_folder, stem + ".pdf")
+    with default_governor().acquire("soffice"):
+        subprocess.run(command + ['--convert-to', 'pdf', ppt_path, '--outdir', output_folder], check=True)
+        # pdftoppm writes the PNGs itself; the pages never pass through Python
+        pages = convert_from_path(pdf_path, dpi=200, output_folder=output_folder, fmt="png",
+                                  output_file=f"{stem}_page", paths_only=True)
+    paths = []
+    for i, page_path in enumerate(pages):
+        path = os.path.join(output_folder, f"slide_{start_index + i}.png")
+        os.replace(page_path, path)
+        paths.append(path)
+    return paths
+
+def sharded_slides_to_images(shard_decks, output_folder, soffice_pool=None, render_gate=None, max_workers=None, rasterize=None):
+    """
+    Rasterize shard decks concurrently, one LibreOffice process per shard, each
+    with its own profile from soffice_pool. render_gate (e.g. a semaphore) is held
+    around each conversion so a batch can still bound total CPU-bound work.
+    Returns every slide image in global order.
+    """
+    rasterize = rasterize or slides_to_images
+
+    def convert(deck):
+        shard_path, start_index = deck
+        with render_gate or nullcontext(), soffice_pool.profile() if soffice_pool else nullcontext() as profile:
+            return rasterize(shard_path, output_folder, soffice_profile=profile, start_index=start_index)
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(shard_decks)) as pool:
+        return [path for paths in pool.map(convert, shard_decks) for path in paths]
@@ -0,0 +1,162 @@
+import asyncio
+import os
+import random
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class PresenterJobError(Exception):
+    pass
+
+
+class PresenterJobClient:
+    """
+    Async client for the presenter-avatar job API (/generate-video/, /job-status/{id},
+    /download-video/{id}).
+
+    All requests share one pooled requests.Session and run on worker threads, so
+    submissions, status polls and downloads for every slide proceed concurrently.
+    Each job is polled with its own exponential backoff (fast at first, slower for
+    long-running jobs), and its video is downloaded as soon as it completes.
+    Downloads resume with a Range request after a dropped connection.
+    """
+
+    def __init__(self, api_path, max_concurrency=8, poll_initial=2.0, poll_max=60.0, poll_factor=1.6,
+                 timeout=3600.0, retries=5, chunk_size=1 << 16):
+        self.api_path = api_path.rstrip("/")
+        self.poll_initial = poll_initial
+        self.poll_max = poll_max
+        self.poll_factor = poll_factor
+        self.timeout = timeout
+        self.retries = retries
+        self.chunk_size = chunk_size
+        self.max_concurrency = max_concurrency
+        self._slots = None
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self):
+        self.session.close()
+
+    async def _call(self, func, *args, **kwargs):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        async with self._slots:
+            return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def _with_retries(self, func, *args, **kwargs):
+        for attempt in range(self.retries):
+            try:
+                return await self._call(func, *args, **kwargs)
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                if attempt == self.retries - 1:
+                    raise
+                delay = min(self.poll_max, 0.5 * 2 ** attempt) * random.uniform(0.8, 1.2)
+                print(f"⚠️ {type(e).__name__}, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    # Blocking requests, run on worker threads
+
+    def _submit(self, image_path, audio_path, head_name=None):
+        with open(image_path, "rb") as image_file, open(audio_path, "rb") as audio_file:
+            files = {
+                "image": ("image.jpg", image_file, "image/jpeg"),
+                "audio": ("audio.mp3", audio_file, "audio/mpeg"),
+            }
+            data = {"head_name": head_name} if head_name else {}
+            resp = self.session.post(f"{self.api_path}/generate-video/", files=files, data=data, timeout=60)
+        resp.raise_for_status()
+        return resp.json()["job_id"]
+
+    def _status(self, job_id):
+        resp = self.session.get(f"{self.api_path}/job-status/{job_id}", timeout=30)
+        resp.raise_for_status()
+        return resp.json()
+
+    def _download(self, job_id, save_path):
+        """
+        Download (or continue downloading) a finished video. A partial file left by
+        an earlier attempt is resumed with a Range request.
+        """
+        part_path = save_path + ".part"
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        with self.session.get(f"{self.api_path}/download-video/{job_id}", headers=headers, stream=True, timeout=60) as resp:
+            if resp.status_code == 416:
+                # Nothing left to fetch: the partial file is already complete
+                os.replace(part_path, save_path)
+                return save_path
+            resp.raise_for_status()
+            mode = "ab" if resp.status_code == 206 else "wb"
+            with open(part_path, mode) as f:
+                for chunk in resp.iter_content(chunk_size=self.chunk_size):
+                    if chunk:
+                        f.write(chunk)
+        os.replace(part_path, save_path)
+        return save_path
+
+    # Async job lifecycle
+
+    async def run_job(self, image_path, audio_path, save_path, head_name=None):
+        """
+        Submit one job, poll it with backoff and download the result.
+        Returns a dict with job_id, status, video_path and error.
+        """
+        job = {"job_id": None, "status": "submitting", "video_path": None, "error": None}
+        try:
+            job["job_id"] = await self._with_retries(self._submit, image_path, audio_path, head_name)
+            job["status"] = "processing"
+
+            delay, deadline = self.poll_initial, time.monotonic() + self.timeout
+            while True:
+                await asyncio.sleep(delay * random.uniform(0.9, 1.1))
+                status = await self._with_retries(self._status, job["job_id"])
+                # Some deployments answer with the bare status string
+                state, error = (status.get("status"), status.get("error")) if isinstance(status, dict) else (status, None)
+                if state == "completed":
+                    break
+                if state == "failed":
+                    raise PresenterJobError(error or f"Job {job['job_id']} failed")
+                if time.monotonic() > deadline:
+                    raise PresenterJobError(f"Job {job['job_id']} timed out")
+                delay = min(self.poll_max, delay * self.poll_factor)
+
+            job["status"] = "downloading"
+            job["video_path"] = await self._with_retries(self._download, job["job_id"], save_path)
+            job["status"] = "completed"
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = f"{type(e).__name__}: {e}"
+            print(f"❌ Presenter job {job['job_id']} failed: {job['error']}")
+        return job
+
+    async def run_jobs(self, requests_list, output_dir, head_name=None):
+        """
+        Run every (image_path, audio_path) pair concurrently. Results keep input order.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        tasks = [
+            self.run_job(image_path, audio_path, os.path.join(output_dir, f"presenter_{i:04d}.mp4"), head_name)
+            for i, (image_path, audio_path) in enumerate(requests_list)
+        ]
+        return await asyncio.gather(*tasks)
+
+
+def generate_presenter_videos(api_path, avatar_path, audio_paths, output_dir, **client_options):
+    """
+    Blocking wrapper: one presenter video per narration clip, all jobs in flight at once.
+    Returns a list of video paths (None where the job failed).
+    """
+    client = PresenterJobClient(api_path, **client_options)
+    try:
+        jobs = asyncio.run(client.run_jobs([(avatar_path, audio) for audio in audio_paths], output_dir))
+    finally:
+        client.close()
+    completed = sum(1 for job in jobs if job["status"] == "completed")
+    print(f"✅ {completed}/{len(jobs)} presenter videos downloaded")
+    return [job["video_path"] for job in jobs]
@@ -0,0 +1,114 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from job_server import parse_range
+
+
+class StubPresenterHandler(BaseHTTPRequestHandler):
+    """
+    Stand-in for the presenter-avatar API, for exercising presenter_client locally.
+
+    Jobs complete after a random latency in [min_latency, max_latency] seconds, a
+    fraction fail_rate of them fail, and a fraction drop_rate of downloads are cut off
+    halfway through so the client has to resume with a Range request.
+    """
+
+    min_latency = 1.0
+    max_latency = 5.0
+    fail_rate = 0.1
+    drop_rate = 0.2
+    video_bytes = 2 * 1024 * 1024
+    jobs = {}
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, code=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/generate-video":
+            return self._send_json({"detail": "Not found"}, 404)
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        job_id = uuid.uuid4().hex
+        with self.lock:
+            self.jobs[job_id] = {
+                "ready_at": time.time() + random.uniform(self.min_latency, self.max_latency),
+                "fails": random.random() < self.fail_rate,
+                "polls": 0,
+            }
+        self._send_json({"job_id": job_id})
+
+    def do_GET(self):
+        match = re.fullmatch(r"/(job-status|download-video)/([0-9a-f]+)/?", self.path)
+        job = self.jobs.get(match.group(2)) if match else None
+        if job is None:
+            return self._send_json({"detail": "Not found"}, 404)
+
+        if match.group(1) == "job-status":
+            with self.lock:
+                job["polls"] += 1
+            if time.time() < job["ready_at"]:
+                return self._send_json({"status": "processing"})
+            if job["fails"]:
+                return self._send_json({"status": "failed", "error": "simulated failure"})
+            return self._send_json({"status": "completed", "download_url": f"/download-video/{match.group(2)}"})
+
+        size = self.video_bytes
+        try:
+            byte_range = parse_range(self.headers.get("Range"), size)
+        except ValueError:
+            self.send_response(416)
+            self.end_headers()
+            return
+        start, end = byte_range or (0, size - 1)
+        self.send_response(206 if byte_range else 200)
+        self.send_header("Content-Length", str(end - start + 1))
+        if byte_range:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+
+        payload = bytes(i % 256 for i in range(start, end + 1))
+        if not byte_range and random.random() < self.drop_rate:
+            # Simulate a dropped connection halfway through the body
+            self.wfile.write(payload[:len(payload) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(payload)
+
+
+def serve(host="127.0.0.1", port=8100):
+    server = ThreadingHTTPServer((host, port), StubPresenterHandler)
+    print(f"✅ Stub presenter API listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub presenter-avatar API with simulated latency and failures.")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--min-latency", type=float, default=StubPresenterHandler.min_latency)
+    parser.add_argument("--max-latency", type=float, default=StubPresenterHandler.max_latency)
+    parser.add_argument("--fail-rate", type=float, default=StubPresenterHandler.fail_rate)
+    parser.add_argument("--drop-rate", type=float, default=StubPresenterHandler.drop_rate)
+    args = parser.parse_args()
+    StubPresenterHandler.min_latency = args.min_latency
+    StubPresenterHandler.max_latency = args.max_latency
+    StubPresenterHandler.fail_rate = args.fail_rate
+    StubPresenterHandler.drop_rate = args.drop_rate
+    serve(port=args.port)
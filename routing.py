@@ -0,0 +1,137 @@
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from pydantic import BaseModel
+
+# Rough size of a token in characters of English prose, for sizing max_tokens
+CHARS_PER_TOKEN = 4
+
+
+class RoutePolicy(BaseModel):
+    """
+    How one kind of generation task calls the LLM.
+
+    max_tokens is sized per call from the prompt: min_tokens plus output_ratio
+    times the prompt's token count, capped at max_tokens. Tasks in the "light"
+    lane have their own concurrency limit, so they never queue behind deck
+    generation in the "heavy" lane.
+    """
+    model: str
+    min_tokens: int
+    max_tokens: int
+    output_ratio: float = 0.0
+    temperature: float = 0.3
+    lane: str = "heavy"
+
+    def tokens_for(self, prompt):
+        expected = self.min_tokens + int(len(prompt) / CHARS_PER_TOKEN * self.output_ratio)
+        return min(self.max_tokens, expected)
+
+
+ROUTES = {
+    # Full slide decks (one per chunk, or one per outline section): the largest outputs
+    "slides": RoutePolicy(model="openai/gpt-4.1", min_tokens=3000, max_tokens=16000, output_ratio=0.6),
+    # One global outline from merged summaries
+    "outline": RoutePolicy(model="openai/gpt-4.1", min_tokens=1500, max_tokens=4000, output_ratio=0.2),
+    # Map and reduce summaries: short, bounded outputs
+    "summary": RoutePolicy(model="openai/gpt-4.1-mini", min_tokens=600, max_tokens=1500, output_ratio=0.1, lane="light"),
+    # Narration translation: output about as long as the input
+    "translation": RoutePolicy(model="openai/gpt-4.1-mini", min_tokens=500, max_tokens=8000, output_ratio=1.3,
+                               temperature=0.2, lane="light"),
+    # Fixing a reply that did not parse: the reply again, corrected
+    "repair": RoutePolicy(model="openai/gpt-4.1-mini", min_tokens=1000, max_tokens=16000, output_ratio=1.1,
+                          temperature=0.0, lane="light"),
+}
+
+
+def route(task):
+    """
+    Policy for a task; ROUTE_<TASK>_MODEL overrides its model.
+    """
+    policy = ROUTES[task]
+    model = os.getenv(f"ROUTE_{task.upper()}_MODEL")
+    return policy.model_copy(update={"model": model}) if model else policy
+
+
+class RouteStats:
+    """
+    Per-route call counts, failures, cache hits, token totals and latencies
+    (the most recent `window` calls). Each pipeline run collects its own (see
+    collect_route_stats); calls made outside a run go to `route_stats`.
+    """
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.lock = threading.Lock()
+        self.routes = {}
+
+    def _entry(self, task, model):
+        return self.routes.setdefault(task, {
+            "model": model, "calls": 0, "failures": 0, "cache_hits": 0,
+            "tokens_in": 0, "tokens_out": 0, "latencies": deque(maxlen=self.window),
+        })
+
+    def record_call(self, task, model, seconds, ok=True, tokens_in=0, tokens_out=0):
+        with self.lock:
+            entry = self._entry(task, model)
+            entry["model"] = model
+            entry["calls"] += 1
+            entry["failures"] += 0 if ok else 1
+            entry["tokens_in"] += tokens_in or 0
+            entry["tokens_out"] += tokens_out or 0
+            entry["latencies"].append(seconds)
+
+    def record_cache_hit(self, task, model):
+        with self.lock:
+            self._entry(task, model)["cache_hits"] += 1
+
+    def record_failure(self, task, model):
+        """
+        A reply that arrived but could not be used (counted on top of its call).
+        """
+        with self.lock:
+            self._entry(task, model)["failures"] += 1
+
+    def snapshot(self):
+        with self.lock:
+            report = {}
+            for task, entry in self.routes.items():
+                latencies = sorted(entry["latencies"])
+                report[task] = {
+                    "model": entry["model"],
+                    "calls": entry["calls"],
+                    "failures": entry["failures"],
+                    "failure_rate": round(entry["failures"] / entry["calls"], 3) if entry["calls"] else 0.0,
+                    "cache_hits": entry["cache_hits"],
+                    "tokens_in": entry["tokens_in"],
+                    "tokens_out": entry["tokens_out"],
+                    "latency_avg_s": round(sum(latencies) / len(latencies), 3) if latencies else None,
+                    "latency_p95_s": round(latencies[int(0.95 * (len(latencies) - 1))], 3) if latencies else None,
+                    "latency_max_s": round(latencies[-1], 3) if latencies else None,
+                }
+            return report
+
+
+route_stats = RouteStats()
+_run_stats = ContextVar("run_route_stats", default=None)
+
+
+def current_route_stats():
+    return _run_stats.get() or route_stats
+
+@contextmanager
+def collect_route_stats():
+    """
+    Collect the stats of every LLM call made in this context (and in threads
+    started with tracing.submit_in_context) into a fresh RouteStats, so
+    concurrent runs in one process each get their own.
+    """
+    stats = RouteStats()
+    token = _run_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _run_stats.reset(token)
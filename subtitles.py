@@ -0,0 +1,130 @@
+"""
+Captions from the TTS word timings: words are grouped into short cues, shifted
+by each clip's start in the video and written as SRT and WebVTT sidecars, or as a
+per-segment SRT that the segment encode burns in.
+"""
+import json
+import os
+import re
+
+# One caption line at a time, readable at 1080p
+CUE_MAX_CHARS = 42
+CUE_MAX_SECONDS = 5.0
+
+
+def estimate_word_timings(script, duration):
+    """
+    Fallback when a clip has no word events: spread the words over the clip in
+    proportion to their length.
+    """
+    words = script.split()
+    total = sum(len(word) + 1 for word in words)
+    timings, start = [], 0.0
+    for word in words:
+        length = duration * (len(word) + 1) / total
+        timings.append({"text": word, "start": round(start, 3), "end": round(start + length, 3)})
+        start += length
+    return timings
+
+def align_to_script(words, script):
+    """
+    Give each timed word its spelling from the script. edge-tts word boundaries
+    carry bare words ("Hey", "folks"), so the punctuation that build_cues breaks
+    on ("folks!") is taken from the script: each word is found in order, and the
+    punctuation touching it on the outside of its token is added. Words that
+    cannot be found (text the TTS normalised) are kept as they are.
+    """
+    aligned, position = [], 0
+    for word in words:
+        pattern = re.compile(rf"(?<!\w){re.escape(word['text'])}(?!\w)", re.IGNORECASE)
+        match = pattern.search(script, position) if word["text"] else None
+        if match is None:
+            aligned.append(word)
+            continue
+        start, end = match.span()
+        # Leading punctuation of the token ("(", quotes), if the word starts it
+        lead = start
+        while lead > position and not script[lead - 1].isspace() and not script[lead - 1].isalnum():
+            lead -= 1
+        if lead == 0 or script[lead - 1].isspace():
+            start = lead
+        # Trailing punctuation of the token, if the word ends it ("it!", "dog).")
+        trail = end
+        while trail < len(script) and not script[trail].isspace() and not script[trail].isalnum():
+            trail += 1
+        if trail == len(script) or script[trail].isspace():
+            end = trail
+        aligned.append({**word, "text": script[start:end]})
+        position = end
+    return aligned
+
+def load_word_timings(words_path, script, duration):
+    """
+    Word timings saved next to a clip, spelled as in the script, or estimated
+    ones if there are none.
+    """
+    words = None
+    if words_path and os.path.exists(words_path):
+        with open(words_path, encoding="utf-8") as f:
+            words = json.load(f)
+    return align_to_script(words, script) if words else estimate_word_timings(script, duration)
+
+def build_cues(words, end=None):
+    """
+    Group one clip's word timings into cues of at most CUE_MAX_CHARS characters
+    and CUE_MAX_SECONDS, breaking after sentence punctuation. Cues are cut at
+    `end` seconds when given.
+    """
+    cues, current = [], []
+
+    def flush():
+        if current:
+            cues.append({"start": current[0]["start"], "end": current[-1]["end"],
+                         "text": " ".join(word["text"] for word in current)})
+            current.clear()
+
+    for word in words:
+        if end is not None and word["start"] >= end:
+            break
+        word = {**word, "end": min(word["end"], end) if end is not None else word["end"]}
+        length = len(" ".join(w["text"] for w in current + [word]))
+        if current and (length > CUE_MAX_CHARS or word["end"] - current[0]["start"] > CUE_MAX_SECONDS):
+            flush()
+        current.append(word)
+        if re.search(r"[.!?;:]$", word["text"]):
+            flush()
+    flush()
+    return cues
+
+def shift_cues(cues, offset):
+    """
+    Clip-relative cues moved to the clip's start time in the video.
+    """
+    return [{**cue, "start": round(cue["start"] + offset, 3), "end": round(cue["end"] + offset, 3)} for cue in cues]
+
+def format_timestamp(seconds, separator=","):
+    milliseconds = round(seconds * 1000)
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{milliseconds:03d}"
+
+def write_srt(cues, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for i, cue in enumerate(cues, 1):
+            f.write(f"{i}\n{format_timestamp(cue['start'])} --> {format_timestamp(cue['end'])}\n{cue['text']}\n\n")
+    return path
+
+def write_vtt(cues, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("WEBVTT\n\n")
+        for cue in cues:
+            f.write(f"{format_timestamp(cue['start'], '.')} --> {format_timestamp(cue['end'], '.')}\n{cue['text']}\n\n")
+    return path
+
+def write_sidecars(cues, video_path):
+    """
+    <video>.srt and <video>.vtt next to the video.
+    """
+    base, _ = os.path.splitext(video_path)
+    return write_srt(cues, base + ".srt"), write_vtt(cues, base + ".vtt")
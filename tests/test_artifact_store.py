@@ -0,0 +1,34 @@
+import os
+
+from artifact_store import ArtifactStore
+
+
+def test_overwriting_a_materialised_file_leaves_the_entry_intact(tmp_path):
+    store = ArtifactStore(str(tmp_path / "store"))
+    src = tmp_path / "clip.mp3"
+    src.write_bytes(b"old narration")
+    store.put_file("audio", "key", str(src))
+
+    run_dir = tmp_path / "run"
+    run_dir.mkdir()
+    dest = run_dir / "1_audio.mp3"
+    assert store.get_file("audio", "key", str(dest))
+    # A producer writing over its output path in place (edge-tts, ffmpeg -y, PIL save)
+    with open(dest, "wb") as f:
+        f.write(b"new narration")
+
+    assert store.get_bytes("audio", "key") == b"old narration"
+    assert store.get_file("audio", "key", str(tmp_path / "again.mp3"))
+    assert (tmp_path / "again.mp3").read_bytes() == b"old narration"
+
+
+def test_corrupt_blob_is_a_miss(tmp_path):
+    store = ArtifactStore(str(tmp_path / "store"))
+    blob_path = store.put_bytes("segment", "key", b"encoded segment")
+    os.chmod(blob_path, 0o644)
+    with open(blob_path, "wb") as f:
+        f.write(b"tampered")
+
+    assert not store.get_file("segment", "key", str(tmp_path / "out.mp4"))
+    assert not (tmp_path / "out.mp4").exists()
+    assert store.get_path("segment", "key") is None
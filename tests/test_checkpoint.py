@@ -0,0 +1,51 @@
+import os
+
+from checkpoint import RunCheckpoint, make_run_id
+
+
+def write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
+
+
+def test_resume_reuses_a_stage_with_the_same_inputs(tmp_path):
+    ckpt = RunCheckpoint(str(tmp_path), "run1")
+    artifact = write(ckpt.path("text.txt"), "extracted")
+    ckpt.save("text", "inputs-v1", data={"chars": 9}, artifacts=[artifact])
+
+    resumed = RunCheckpoint(str(tmp_path), "run1", resume=True)
+    assert resumed.is_complete("text", "inputs-v1")
+    assert resumed.load("text") == {"chars": 9}
+    assert resumed.artifacts("text") == [artifact]
+
+
+def test_changed_inputs_or_artifacts_invalidate_the_stage(tmp_path):
+    ckpt = RunCheckpoint(str(tmp_path), "run1")
+    artifact = write(ckpt.path("chunks", "chunk_results.json"), "[]")
+    ckpt.save("chunks", "inputs-v1", artifacts=[artifact])
+
+    resumed = RunCheckpoint(str(tmp_path), "run1", resume=True)
+    assert not resumed.is_complete("chunks", "inputs-v2")
+
+    # Edited by hand: not reusable as is, but recognised as an edit
+    write(artifact, '[{"slides": []}]')
+    assert not resumed.is_complete("chunks", "inputs-v1")
+    assert resumed.is_edited("chunks", "inputs-v1")
+
+    # Gone: neither complete nor edited
+    os.remove(artifact)
+    assert not resumed.is_complete("chunks", "inputs-v1")
+    assert not resumed.is_edited("chunks", "inputs-v1")
+
+
+def test_without_resume_nothing_is_reused(tmp_path):
+    ckpt = RunCheckpoint(str(tmp_path), "run1")
+    ckpt.save("text", "inputs", artifacts=[write(ckpt.path("text.txt"), "x")])
+    assert not RunCheckpoint(str(tmp_path), "run1").is_complete("text", "inputs")
+
+
+def test_run_id_follows_pdf_and_config():
+    assert make_run_id("pdf", {"theme": "a"}) == make_run_id("pdf", {"theme": "a"})
+    assert make_run_id("pdf", {"theme": "a"}) != make_run_id("pdf", {"theme": "b"})
+    assert make_run_id("pdf", {"theme": "a"}) != make_run_id("other", {"theme": "a"})
@@ -0,0 +1,43 @@
+from dedup import dedup_results, near_duplicate_pairs
+from main_version_4 import ShortVideoSegment, SlideChunk, SlideItem
+
+PROMISES = ("A promise represents the eventual completion or failure of an asynchronous operation "
+            "and its resulting value, and lets you chain handlers with then and catch.")
+
+
+def slide(title, content, key_points=()):
+    return SlideItem(title=title, content=content, key_points=list(key_points), voice_over=content)
+
+
+def test_near_duplicates_across_chunks_are_merged_into_the_first():
+    results = [
+        SlideChunk(slides=[slide("Promises", PROMISES, ["then"]), slide("Event loop", "The event loop runs "
+                                                                        "queued callbacks one at a time.")]),
+        SlideChunk(slides=[slide("Promises recap", PROMISES + " Really.", ["catch"])]),
+    ]
+
+    deduped, report = dedup_results(results)
+
+    assert [[s.title for s in chunk.slides] for chunk in deduped] == [["Promises", "Event loop"], []]
+    assert deduped[0].slides[0].key_points == ["then", "catch"]
+    assert report["slides_in"] == 3 and report["slides_out"] == 2
+    assert report["merged"] == [{"kept": "Promises", "dropped": "Promises recap"}]
+    # The input is left untouched
+    assert results[0].slides[0].key_points == ["then"]
+
+
+def test_duplicate_shorts_are_dropped():
+    short = ShortVideoSegment(title="Promises in 60s", content=PROMISES, script=PROMISES)
+    results = [SlideChunk(slides=[], short_segments=[short]),
+               SlideChunk(slides=[], short_segments=[short.model_copy(update={"title": "Promises, fast"})])]
+
+    deduped, report = dedup_results(results)
+
+    assert [len(chunk.short_segments) for chunk in deduped] == [1, 0]
+    assert report["shorts_out"] == 1
+
+
+def test_unrelated_texts_are_not_paired():
+    texts = [PROMISES, "Closures capture variables from the scope where a function was defined.",
+             "Modules split code into files with explicit imports and exports."]
+    assert near_duplicate_pairs(texts) == []
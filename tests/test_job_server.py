@@ -0,0 +1,69 @@
+import http.client
+import json
+import os
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import job_server
+from job_server import JobQueue, JobRequestHandler, multipart_parts
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    runs = []
+    monkeypatch.setattr(JobQueue, "_run", lambda self, job_id, pdf_path, job_dir, options: runs.append(
+        (pdf_path, open(pdf_path, "rb").read(), options)))
+    JobRequestHandler.jobs = JobQueue(str(tmp_path / "service"), max_concurrent=1)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), JobRequestHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd.server_address[1], runs
+    httpd.shutdown()
+    JobRequestHandler.jobs.close()
+
+
+def post(port, body, boundary="XyZ"):
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    connection.request("POST", "/generate-video", body=body,
+                       headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+
+def form(filename, content, **fields):
+    body = b""
+    for name, value in fields.items():
+        body += f'--XyZ\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+    body += (f'--XyZ\r\nContent-Disposition: form-data; name="pdf"; filename="{filename}"\r\n'
+             "Content-Type: application/pdf\r\n\r\n").encode() + content + b"\r\n--XyZ--\r\n"
+    return body
+
+
+def test_upload_is_always_written_to_input_pdf(server):
+    port, runs = server
+    content = b"%PDF-1.4\r\n--Xy not a boundary\r\n" + os.urandom(300_000)
+    status, payload = post(port, form("..", content, language="es"))
+
+    assert status == 202
+    JobRequestHandler.jobs.pool.shutdown(wait=True)
+    pdf_path, written, options = runs[0]
+    assert os.path.basename(pdf_path) == "input.pdf"
+    assert os.path.basename(os.path.dirname(pdf_path)) == payload["job_id"]
+    assert written == content
+    assert options == {"language": "es"}
+
+
+def test_oversized_and_malformed_uploads_are_rejected(server, monkeypatch):
+    port, runs = server
+    assert post(port, b"no boundary here")[0] == 400
+    monkeypatch.setattr(job_server, "MAX_UPLOAD_BYTES", 100)
+    assert post(port, form("a.pdf", b"x" * 200))[0] == 413
+    assert runs == []
+
+
+def test_multipart_parts_offsets():
+    body = form("a.pdf", b"PDF", theme="dark")
+    (theme, start, end), (pdf, pdf_start, pdf_end) = multipart_parts(body, "XyZ")
+    assert theme.get_param("name", header="content-disposition") == "theme" and body[start:end] == b"dark"
+    assert pdf.get_filename() == "a.pdf" and body[pdf_start:pdf_end] == b"PDF"
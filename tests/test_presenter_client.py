@@ -0,0 +1,61 @@
+import asyncio
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from presenter_client import PresenterJobClient
+from presenter_stub import StubPresenterHandler
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    monkeypatch.setattr(StubPresenterHandler, "jobs", {})
+    monkeypatch.setattr(StubPresenterHandler, "min_latency", 0.05)
+    monkeypatch.setattr(StubPresenterHandler, "max_latency", 0.2)
+    monkeypatch.setattr(StubPresenterHandler, "video_bytes", 300_000)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubPresenterHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+def run_jobs(api_path, tmp_path, count=4, **options):
+    image, audio = tmp_path / "avatar.jpg", tmp_path / "clip.mp3"
+    image.write_bytes(b"jpg")
+    audio.write_bytes(b"mp3")
+    client = PresenterJobClient(api_path, poll_initial=0.02, poll_max=0.1, **options)
+    try:
+        return client, asyncio.run(client.run_jobs([(str(image), str(audio))] * count, str(tmp_path / "out")))
+    finally:
+        client.close()
+
+
+def test_every_dropped_download_is_resumed(stub, tmp_path, monkeypatch):
+    monkeypatch.setattr(StubPresenterHandler, "fail_rate", 0.0)
+    monkeypatch.setattr(StubPresenterHandler, "drop_rate", 1.0)
+
+    _, jobs = run_jobs(stub, tmp_path)
+
+    expected = bytes(i % 256 for i in range(StubPresenterHandler.video_bytes))
+    assert [job["status"] for job in jobs] == ["completed"] * 4
+    for job in jobs:
+        assert open(job["video_path"], "rb").read() == expected
+
+
+def test_failed_jobs_report_the_server_error(stub, tmp_path, monkeypatch):
+    monkeypatch.setattr(StubPresenterHandler, "fail_rate", 1.0)
+
+    _, jobs = run_jobs(stub, tmp_path, count=2)
+
+    assert [job["status"] for job in jobs] == ["failed"] * 2
+    assert all(job["error"] == "PresenterJobError: simulated failure" for job in jobs)
+
+
+def test_plain_string_failed_status(stub, tmp_path, monkeypatch):
+    monkeypatch.setattr(PresenterJobClient, "_status", lambda self, job_id: "failed")
+
+    _, jobs = run_jobs(stub, tmp_path, count=1)
+
+    assert jobs[0]["status"] == "failed"
+    assert jobs[0]["error"].startswith("PresenterJobError: Job ")
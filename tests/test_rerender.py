@@ -0,0 +1,72 @@
+import json
+import os
+import wave
+
+from PIL import Image
+
+from assembler import (EditDecisionList, StreamingAssembler, encode_still_segment, probe_duration, rerender,
+                       segment_input_hash)
+
+
+def write_wav(path, seconds, rate=16000):
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(b"\0\0" * int(seconds * rate))
+    return str(path)
+
+
+def write_png(path, colour):
+    Image.new("RGB", (160, 120), colour).save(path)
+    return str(path)
+
+
+def test_rerender_reencodes_only_the_edited_segment(tmp_path, monkeypatch):
+    work = tmp_path / "segments"
+    edl_path = str(work / "edl.json")
+    images = [write_png(tmp_path / f"{i}.png", colour) for i, colour in enumerate(["red", "blue"])]
+    audio = [write_wav(tmp_path / f"{i}.wav", 0.5) for i in range(2)]
+    with StreamingAssembler(str(work), edl_path=edl_path) as assembler:
+        for image, clip in zip(images, audio):
+            assembler.add(image, clip)
+        assembler.finish(str(tmp_path / "final.mp4"))
+    before = EditDecisionList(edl_path).segments
+
+    # Swap the second slide for an edited image, then rebuild from another directory
+    os.replace(write_png(tmp_path / "edited.png", "green"), images[1])
+    elsewhere = tmp_path / "elsewhere"
+    elsewhere.mkdir()
+    monkeypatch.chdir(elsewhere)
+    output = rerender(edl_path)
+
+    after = EditDecisionList(edl_path).segments
+    assert output == str(tmp_path / "final.mp4")
+    assert all(os.path.isabs(entry["segment"]) for entry in after)
+    assert after[0]["segment_sha256"] == before[0]["segment_sha256"]
+    assert after[1]["segment_sha256"] != before[1]["segment_sha256"]
+    assert abs(probe_duration(output) - 1.0) < 0.2
+
+
+def test_replaced_narration_gets_new_captions(tmp_path):
+    image = write_png(tmp_path / "slide.png", "white")
+    clip = write_wav(tmp_path / "narration.wav", 1.0)
+    words_path = tmp_path / "words.json"
+    words_path.write_text(json.dumps([{"text": "Hello", "start": 0.0, "end": 0.4},
+                                      {"text": "world.", "start": 0.4, "end": 0.9}]))
+    segment = str(tmp_path / "segment_0000.mp4")
+    encode_still_segment(image, clip, segment, duration=1.0)
+    edl = EditDecisionList(str(tmp_path / "edl.json"))
+    edl.record(0, image, clip, segment, segment_input_hash(image, clip), duration=1.0,
+               script="Hello world.", words_path=str(words_path))
+    edl.save(str(tmp_path / "final.mp4"))
+
+    write_wav(tmp_path / "narration.wav", 2.0)
+    rerender(edl.path)
+
+    words = json.loads(words_path.read_text())
+    assert [w["text"] for w in words] == ["Hello", "world."]
+    assert words[-1]["end"] > 1.5
+    srt = (tmp_path / "final.srt").read_text()
+    assert "Hello world." in srt
+    assert EditDecisionList(edl.path).segments[0]["duration"] > 1.5
@@ -0,0 +1,94 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import main_version_4
+from artifact_store import ArtifactStore
+from routing import ROUTES, collect_route_stats, route
+
+
+class ScriptedClient:
+    """
+    Chat client stub that answers with the queued (content, finish_reason) replies
+    in order and records the requests it got.
+    """
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.requests = []
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        content, finish_reason = self.replies.pop(0)
+        choice = SimpleNamespace(message=SimpleNamespace(content=content), finish_reason=finish_reason)
+        return SimpleNamespace(choices=[choice], usage=None)
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    def install(*replies):
+        client = ScriptedClient(*replies)
+        monkeypatch.setattr(main_version_4, "client", client)
+        return client
+    return install
+
+
+def test_tokens_for_grows_with_the_prompt_within_bounds():
+    policy = ROUTES["summary"]
+    assert policy.tokens_for("") == policy.min_tokens
+    assert policy.min_tokens < policy.tokens_for("x" * 8000) < policy.max_tokens
+    assert policy.tokens_for("x" * 10_000_000) == policy.max_tokens
+
+
+def test_model_can_be_overridden_from_the_environment(monkeypatch):
+    monkeypatch.setenv("ROUTE_SUMMARY_MODEL", "local/small")
+    assert route("summary").model == "local/small"
+    assert route("summary").lane == ROUTES["summary"].lane
+    assert ROUTES["summary"].model != "local/small"
+
+
+def test_cut_off_reply_is_retried_with_the_route_ceiling(llm, tmp_path):
+    client = llm(('{"a": ', "length"), ('{"a": 1}', "stop"))
+    store = ArtifactStore(str(tmp_path))
+
+    with collect_route_stats() as stats:
+        result = main_version_4.cached_completion("summarise this", json.loads, "summary", store=store)
+
+    assert result == {"a": 1}
+    assert [r["max_tokens"] for r in client.requests] == [ROUTES["summary"].tokens_for("summarise this"),
+                                                           ROUTES["summary"].max_tokens]
+    report = stats.snapshot()["summary"]
+    assert report["calls"] == 2 and report["failures"] == 1
+
+    # The completed reply is cached under the original key
+    with collect_route_stats() as stats:
+        assert main_version_4.cached_completion("summarise this", json.loads, "summary", store=store) == {"a": 1}
+    assert stats.snapshot()["summary"]["cache_hits"] == 1
+
+
+def test_repaired_reply_is_cached_under_its_own_key(llm, tmp_path):
+    client = llm(("{'a': 1,}", "stop"), ('{"a": 1}', "stop"))
+    store = ArtifactStore(str(tmp_path))
+
+    with collect_route_stats() as stats:
+        assert main_version_4.cached_completion("outline this", json.loads, "outline", store=store) == {"a": 1}
+
+    assert [r["model"] for r in client.requests] == [route("outline").model, route("repair").model]
+    assert set(stats.snapshot()) == {"outline", "repair"}
+    assert store.get_path("llm", ArtifactStore.key("chat", route("outline").model, "outline this")) is None
+
+    # A second run reuses the repaired reply without calling the model
+    with collect_route_stats() as stats:
+        assert main_version_4.cached_completion("outline this", json.loads, "outline", store=store) == {"a": 1}
+    assert client.replies == [] and stats.snapshot() == {}
+
+
+def test_stats_are_collected_per_context(llm):
+    llm(('{"a": 1}', "stop"), ('{"b": 2}', "stop"))
+    with collect_route_stats() as first:
+        main_version_4.cached_completion("one", json.loads, "summary")
+    with collect_route_stats() as second:
+        main_version_4.cached_completion("two", json.loads, "translation")
+    assert set(first.snapshot()) == {"summary"}
+    assert set(second.snapshot()) == {"translation"}
@@ -0,0 +1,37 @@
+import json
+
+from subtitles import align_to_script, build_cues, load_word_timings, write_srt
+
+
+def boundaries(texts, step=0.3):
+    # What edge-tts sends: bare words, no punctuation, in 100ns-derived seconds
+    return [{"text": text, "start": round(i * step, 3), "end": round(i * step + 0.25, 3)}
+            for i, text in enumerate(texts)]
+
+
+def test_cues_break_at_sentence_ends_with_unpunctuated_boundaries(tmp_path):
+    script = "Hey folks! Welcome back to the channel. Today, we're diving in."
+    words = boundaries(["Hey", "folks", "Welcome", "back", "to", "the", "channel", "Today", "we're", "diving", "in"])
+    words_path = tmp_path / "0_words.json"
+    words_path.write_text(json.dumps(words))
+
+    cues = build_cues(load_word_timings(str(words_path), script, 10.0))
+
+    assert [cue["text"] for cue in cues] == ["Hey folks!", "Welcome back to the channel.", "Today, we're diving in."]
+    assert cues[1]["start"] == 0.6 and cues[1]["end"] == 2.05
+
+
+def test_alignment_keeps_timings_and_skips_words_it_cannot_find():
+    script = "Version 2.0 ships (finally) today. It's a cat."
+    words = boundaries(["Version", "two point oh", "ships", "finally", "today", "It's", "a", "cat"])
+
+    aligned = align_to_script(words, script)
+
+    assert [word["text"] for word in aligned] == ["Version", "two point oh", "ships", "(finally)", "today.", "It's",
+                                                  "a", "cat."]
+    assert [word["start"] for word in aligned] == [word["start"] for word in words]
+
+
+def test_srt_timestamps(tmp_path):
+    path = write_srt([{"start": 3661.5, "end": 3662.25, "text": "Hi."}], str(tmp_path / "a.srt"))
+    assert open(path, encoding="utf-8").read() == "1\n01:01:01,500 --> 01:01:02,250\nHi.\n\n"
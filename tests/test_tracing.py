@@ -0,0 +1,34 @@
+import time
+
+from tracing import Tracer, span
+
+
+def test_span_peak_rss_sees_a_spike_the_end_sample_misses():
+    tracer = Tracer()
+    with tracer.activate():
+        with span("before"):
+            time.sleep(0.05)
+        with span("spike"):
+            buffer = bytearray(200 * 2 ** 20)
+            del buffer
+        with span("after"):
+            time.sleep(0.05)
+
+    records = {item.name: item.to_dict(tracer.origin) for item in tracer.spans}
+    assert records["spike"]["peak_rss_mb"] - records["spike"]["rss_end_mb"] > 150
+    # Later spans report their own peak, not the process high-water mark
+    assert records["after"]["peak_rss_mb"] < records["spike"]["peak_rss_mb"] - 150
+
+
+def test_nested_spans_and_critical_path():
+    tracer = Tracer()
+    with tracer.activate():
+        with span("run"):
+            with span("a"):
+                time.sleep(0.01)
+            with span("b"):
+                time.sleep(0.02)
+
+    names = {item.id: item.name for item in tracer.spans}
+    assert {names[item.parent_id] for item in tracer.spans if item.parent_id} == {"run"}
+    assert [item.name for item in tracer.critical_path()] == ["a", "b"]
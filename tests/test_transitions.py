@@ -0,0 +1,49 @@
+import numpy as np
+from PIL import Image
+
+from transitions import blend_frames, transition_input_hash
+
+
+def solid(value, height=130, width=40):
+    return np.full((height, width, 3), value, dtype=np.uint8)
+
+
+def test_crossfade_moves_steadily_from_a_to_b():
+    # Taller than one band of rows, so every band must be blended
+    frames = [frame.copy() for frame in blend_frames(solid(0), solid(200), "crossfade", 5)]
+
+    assert len(frames) == 5
+    levels = [int(frame[0, 0, 0]) for frame in frames]
+    assert 0 < levels[0] and levels[-1] < 200
+    assert levels == sorted(levels) and len(set(levels)) == 5
+    assert all((frame == frame[0, 0]).all() for frame in frames)
+
+
+def test_slide_brings_b_in_from_the_right():
+    a, b = solid(0), solid(255)
+    for frame in blend_frames(a, b, "slide", 3):
+        columns = frame[0, :, 0]
+        seam = int(np.argmax(columns == 255))
+        assert 0 < seam < a.shape[1]
+        assert (columns[:seam] == 0).all() and (columns[seam:] == 255).all()
+
+
+def test_frame_buffer_is_reused():
+    frames = blend_frames(solid(0), solid(200), "crossfade", 2)
+    assert next(frames) is next(frames)
+
+
+def test_input_hash_follows_images_and_settings(tmp_path):
+    paths = []
+    for i, colour in enumerate(["red", "blue"]):
+        paths.append(str(tmp_path / f"{i}.png"))
+        Image.new("RGB", (8, 8), colour).save(paths[-1])
+    base = transition_input_hash(paths[0], paths[1], "crossfade", 0.5)
+
+    assert transition_input_hash(paths[0], paths[1], "crossfade", 0.5) == base
+    assert transition_input_hash(paths[1], paths[0], "crossfade", 0.5) != base
+    assert transition_input_hash(paths[0], paths[1], "slide", 0.5) != base
+    assert transition_input_hash(paths[0], paths[1], "crossfade", 1.0) != base
+
+    Image.new("RGB", (8, 8), "green").save(paths[1])
+    assert transition_input_hash(paths[0], paths[1], "crossfade", 0.5) != base
@@ -0,0 +1,296 @@
+import itertools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+
+_current_tracer = ContextVar("current_tracer", default=None)
+_current_span = ContextVar("current_span", default=None)
+_span_ids = itertools.count(1)
+
+# ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+_RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+_PAGE_SIZE = resource.getpagesize()
+# How often an active tracer samples RSS for the peaks of its open spans
+RSS_SAMPLE_SECONDS = 0.02
+
+
+def peak_rss_bytes():
+    """
+    The process's all-time peak RSS.
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _RSS_UNIT
+
+def current_rss_bytes():
+    """
+    The process's RSS right now, or None where /proc is not available.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+def _mb(size):
+    return round(size / 2 ** 20, 1) if size is not None else None
+
+def children_cpu_seconds():
+    """
+    CPU used by finished subprocesses (ffmpeg, soffice, pdftoppm); process-wide.
+    """
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class Span:
+    """
+    One timed unit of work. Counters (bytes_in, bytes_out, tokens_in, tokens_out,
+    ...) are attached with add() or set() while the span is open.
+    """
+
+    def __init__(self, name, parent_id=None, attrs=None):
+        self.id = next(_span_ids)
+        self.name = name
+        self.parent_id = parent_id
+        self.attrs = dict(attrs or {})
+        self.thread_id = threading.get_ident()
+        self.start = self.end = None
+        self.cpu = 0.0
+        self.child_cpu = 0.0
+        self.rss_start = self.rss_end = self.peak_rss = None
+        self.error = None
+
+    @property
+    def rss_growth(self):
+        """
+        Process RSS at the end minus at the start (other threads' allocations included).
+        """
+        if self.rss_start is None or self.rss_end is None:
+            return None
+        return self.rss_end - self.rss_start
+
+    @property
+    def wall(self):
+        return (self.end or time.perf_counter()) - self.start
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add(self, key, amount):
+        self.attrs[key] = self.attrs.get(key, 0) + (amount or 0)
+
+    def to_dict(self, origin):
+        return {
+            "id": self.id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "thread_id": self.thread_id,
+            "start_s": round(self.start - origin, 6),
+            "wall_s": round(self.wall, 6),
+            "cpu_s": round(self.cpu, 6),
+            "child_cpu_s": round(self.child_cpu, 6),
+            "rss_start_mb": _mb(self.rss_start),
+            "rss_end_mb": _mb(self.rss_end),
+            "peak_rss_mb": _mb(self.peak_rss),
+            "error": self.error,
+            **self.attrs,
+        }
+
+
+class Tracer:
+    """
+    Collects spans for one pipeline run.
+
+    Activate it with `with tracer.activate():`; every `with span(...)` inside that
+    context (including code called from it) is recorded and nested under the
+    innermost open span. Outside an active tracer, span() is a no-op.
+    """
+
+    def __init__(self, run_id=None):
+        self.run_id = run_id
+        self.origin = time.perf_counter()
+        self.spans = []
+        self.lock = threading.Lock()
+        self._open = set()
+        self._activations = 0
+        self._stop_sampling = threading.Event()
+
+    @contextmanager
+    def activate(self):
+        token = _current_tracer.set(self)
+        with self.lock:
+            self._activations += 1
+            if self._activations == 1:
+                self._stop_sampling.clear()
+                threading.Thread(target=self._sample_rss, name="tracer-rss", daemon=True).start()
+        try:
+            yield self
+        finally:
+            with self.lock:
+                self._activations -= 1
+                if not self._activations:
+                    self._stop_sampling.set()
+            _current_tracer.reset(token)
+
+    def _sample_rss(self):
+        # Raise the peak of every open span to the current RSS, every RSS_SAMPLE_SECONDS
+        while not self._stop_sampling.wait(RSS_SAMPLE_SECONDS):
+            rss = current_rss_bytes()
+            if rss is None:
+                return
+            with self.lock:
+                for item in self._open:
+                    item.peak_rss = max(item.peak_rss or 0, rss)
+
+    def export_jsonl(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for item in self.spans:
+                f.write(json.dumps(item.to_dict(self.origin)) + "\n")
+        return path
+
+    def export_chrome_trace(self, path):
+        """
+        Write a Chrome trace-event file, viewable in chrome://tracing or Perfetto.
+        """
+        events = []
+        for item in self.spans:
+            record = item.to_dict(self.origin)
+            events.append({
+                "name": item.name,
+                "cat": item.name.split(".")[0],
+                "ph": "X",
+                "ts": record["start_s"] * 1e6,
+                "dur": record["wall_s"] * 1e6,
+                "pid": os.getpid(),
+                "tid": item.thread_id,
+                "args": {key: value for key, value in record.items() if key not in ("name", "start_s", "wall_s")},
+            })
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"run_id": self.run_id}}, f)
+        return path
+
+    def children(self, parent):
+        return [item for item in self.spans if item.parent_id == parent.id]
+
+    def critical_path(self, root=None):
+        """
+        Chain of spans that determined the run's end time.
+
+        Starting at the end of the root, repeatedly take the child that finished last
+        before the current point in time, then continue from that child's start.
+        Nested spans are expanded the same way, so the result is a list of leaves.
+        """
+        roots = [root] if root else [item for item in self.spans if item.parent_id is None]
+        path = []
+        for node in roots:
+            children = self.children(node)
+            if not children:
+                path.append(node)
+                continue
+            chain, cursor = [], node.end
+            while True:
+                candidates = [child for child in children if child.end <= cursor + 1e-9 and child not in chain]
+                if not candidates:
+                    break
+                last = max(candidates, key=lambda child: child.end)
+                chain.append(last)
+                cursor = last.start
+            for child in reversed(chain):
+                path.extend(self.critical_path(child))
+        return path
+
+    def summary(self):
+        """
+        Per-span-name totals plus the critical path, as printable text.
+        """
+        totals = {}
+        for item in self.spans:
+            row = totals.setdefault(item.name, {"count": 0, "wall": 0.0, "cpu": 0.0, "rss": None, "peak": None,
+                                                "bytes_in": 0, "bytes_out": 0, "tokens": 0})
+            row["count"] += 1
+            row["wall"] += item.wall
+            row["cpu"] += item.cpu + item.child_cpu
+            if item.peak_rss is not None:
+                row["peak"] = max(row["peak"] or 0, item.peak_rss)
+            if item.rss_growth is not None:
+                row["rss"] = item.rss_growth if row["rss"] is None else max(row["rss"], item.rss_growth)
+            row["bytes_in"] += item.attrs.get("bytes_in", 0)
+            row["bytes_out"] += item.attrs.get("bytes_out", 0)
+            row["tokens"] += item.attrs.get("tokens_in", 0) + item.attrs.get("tokens_out", 0)
+
+        critical = self.critical_path()
+        critical_wall = {}
+        for item in critical:
+            critical_wall[item.name] = critical_wall.get(item.name, 0.0) + item.wall
+        run_wall = sum(item.wall for item in self.spans if item.parent_id is None) or 1e-9
+
+        lines = [f"{'span':<24}{'count':>7}{'wall s':>10}{'cpu s':>10}{'+rss MB':>9}{'peak MB':>9}{'in MB':>9}{'out MB':>9}{'tokens':>9}{'crit %':>8}"]
+        for name, row in sorted(totals.items(), key=lambda entry: -entry[1]["wall"]):
+            lines.append(
+                f"{name:<24}{row['count']:>7}{row['wall']:>10.2f}{row['cpu']:>10.2f}{_mb(row['rss']) if row['rss'] is not None else '-':>9}{_mb(row['peak']) if row['peak'] is not None else '-':>9}"
+                f"{row['bytes_in'] / 2 ** 20:>9.1f}{row['bytes_out'] / 2 ** 20:>9.1f}{row['tokens']:>9}"
+                f"{100 * critical_wall.get(name, 0.0) / run_wall:>8.1f}"
+            )
+        lines.append("critical path: " + " -> ".join(f"{item.name} ({item.wall:.2f}s)" for item in critical))
+        return "\n".join(lines)
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Time a block of work under the active tracer: wall time, thread CPU time, the
+    process RSS at start and end and its peak in between are recorded
+    automatically; counters can be added through the span.
+
+    The peak is the highest RSS sampled while the span was open, raised to the
+    process high-water mark (ru_maxrss) when that mark was set during the span,
+    which catches spikes shorter than the sampling interval.
+    """
+    tracer = _current_tracer.get()
+    parent = _current_span.get()
+    item = Span(name, parent.id if parent else None, attrs)
+    if tracer is None:
+        yield item
+        return
+
+    token = _current_span.set(item)
+    cpu_start = time.thread_time()
+    child_cpu_start = children_cpu_seconds()
+    item.rss_start = item.peak_rss = current_rss_bytes()
+    maxrss_start = peak_rss_bytes()
+    with tracer.lock:
+        tracer._open.add(item)
+    item.start = time.perf_counter()
+    try:
+        yield item
+    except BaseException as e:
+        item.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        item.end = time.perf_counter()
+        item.cpu = time.thread_time() - cpu_start
+        item.child_cpu = children_cpu_seconds() - child_cpu_start
+        item.rss_end = current_rss_bytes()
+        maxrss_end = peak_rss_bytes()
+        _current_span.reset(token)
+        with tracer.lock:
+            tracer._open.discard(item)
+            samples = [rss for rss in (item.peak_rss, item.rss_end) if rss is not None]
+            if maxrss_end > maxrss_start:
+                samples.append(maxrss_end)
+            item.peak_rss = max(samples) if samples else None
+            tracer.spans.append(item)
+
+def submit_in_context(pool, fn, *args, **kwargs):
+    """
+    pool.submit() that runs fn inside a copy of the caller's context, so spans
+    opened in worker threads land in the active tracer under the current span.
+    """
+    return pool.submit(copy_context().run, fn, *args, **kwargs)
+
+def file_size(path):
+    return os.path.getsize(path) if path and os.path.exists(path) else 0
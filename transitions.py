@@ -0,0 +1,101 @@
+"""
+Slide transitions as short standalone segments.
+
+Only the frames of the transition window are computed: both slide rasters are
+loaded once, blended with NumPy frame by frame and piped to ffmpeg as raw video,
+with the same encoder settings (and a silent track with the same audio settings)
+as the still segments. The concat demuxer then joins them with the still
+segments by stream copy, so the stills are never re-encoded or composited.
+"""
+import os
+import subprocess
+
+from assembler import ffmpeg_binary, VIDEO_ARGS, AUDIO_ARGS
+from checkpoint import hash_file, hash_inputs
+from workers import default_governor
+
+# VideoConfig.animation_level -> (transition, seconds); "none" means hard cuts
+TRANSITION_STYLES = {
+    "none": None,
+    "subtle": ("crossfade", 0.3),
+    "moderate": ("crossfade", 0.5),
+    "dynamic": ("slide", 0.6),
+}
+# Rows blended per step of a crossfade
+BAND_ROWS = 64
+
+
+def transition_style(animation_level):
+    if animation_level not in TRANSITION_STYLES:
+        raise ValueError(f"Unknown animation_level '{animation_level}' (known: {', '.join(TRANSITION_STYLES)})")
+    return TRANSITION_STYLES[animation_level]
+
+def _load(path, size=None):
+    import numpy as np
+    from PIL import Image
+
+    with Image.open(path) as image:
+        image = image.convert("RGB")
+        if size and image.size != size:
+            image = image.resize(size, Image.LANCZOS)
+        # Even dimensions, as the still segments are scaled to for yuv420p
+        width, height = image.size
+        return np.ascontiguousarray(np.asarray(image, dtype=np.uint8)[:height - height % 2, :width - width % 2])
+
+def blend_frames(a, b, kind, count):
+    """
+    Yield `count` uint8 frames going from raster a to raster b (exclusive of both).
+    The same frame buffer is reused, so each frame must be consumed before the
+    next one is requested; crossfades are computed a band of rows at a time to
+    keep the float temporaries small.
+    """
+    import numpy as np
+
+    height, width = a.shape[:2]
+    frame = np.empty_like(a)
+    for k in range(count):
+        t = (k + 1) / (count + 1)
+        eased = t * t * (3 - 2 * t)
+        if kind == "slide":
+            # b slides in from the right over a
+            offset = round(width * (1 - eased))
+            frame[:, :offset] = a[:, :offset]
+            frame[:, offset:] = b[:, :width - offset]
+        else:
+            for top in range(0, height, BAND_ROWS):
+                rows = slice(top, top + BAND_ROWS)
+                frame[rows] = a[rows] + (b[rows].astype(np.float32) - a[rows]) * eased
+        yield frame
+
+def encode_transition(image_a, image_b, output_path, kind="crossfade", seconds=0.5, fps=24):
+    """
+    Encode the transition from slide image_a to image_b as a silent mp4 segment.
+    """
+    from PIL import Image
+
+    with Image.open(image_a) as image:
+        size = image.size
+    a, b = _load(image_a), _load(image_b, size)
+    height, width = a.shape[:2]
+    count = max(1, round(seconds * fps))
+    command = [ffmpeg_binary(), "-y", "-loglevel", "error",
+               "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-framerate", str(fps), "-i", "-",
+               "-f", "lavfi", "-i", "anullsrc=r=44100:cl=stereo",
+               "-map", "0:v", "-map", "1:a"]
+    tmp_path = output_path + ".tmp.mp4"
+    command += VIDEO_ARGS + ["-r", str(fps)] + AUDIO_ARGS + ["-t", f"{count / fps:.3f}", "-movflags", "+faststart",
+                                                            tmp_path]
+    with default_governor().acquire("encode"):
+        process = subprocess.Popen(command, stdin=subprocess.PIPE)
+        try:
+            for frame in blend_frames(a, b, kind, count):
+                process.stdin.write(frame.tobytes())
+        finally:
+            process.stdin.close()
+        if process.wait():
+            raise subprocess.CalledProcessError(process.returncode, command)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+def transition_input_hash(image_a, image_b, kind, seconds, fps=24):
+    return hash_inputs("transition", hash_file(image_a), hash_file(image_b), kind, seconds, fps, VIDEO_ARGS, AUDIO_ARGS)
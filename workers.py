@@ -0,0 +1,306 @@
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+# Estimated cost of one task of each kind: (CPU slots, memory in MB, external processes)
+TASK_COSTS = {
+    "soffice": (1, 700, 1),   # LibreOffice pptx -> pdf, then pdftoppm
+    "encode": (2, 350, 1),    # libx264 still-image segment + aac
+    "audio": (1, 150, 1),     # ffmpeg audio fitting, concat and muxing; stream-copy concat
+    "probe": (0, 30, 1),      # ffmpeg reading a header
+    "tts": (0, 60, 0),
+    "llm": (0, 20, 0),
+    "llm_light": (0, 10, 0),
+}
+# Share of the currently available memory the governor hands out
+MEMORY_FRACTION = 0.75
+GOVERNOR_DIR = os.getenv("GOVERNOR_DIR", os.path.join(tempfile.gettempdir(), "pdf2video-governor"))
+
+
+def available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def available_memory_mb():
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // 2 ** 20
+    except (ValueError, OSError, AttributeError):
+        return 4096
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class ResourceGovernor:
+    """
+    Admission control for CPU-, memory- and process-heavy work.
+
+    Every task acquires its estimated cost (TASK_COSTS) in CPU slots, memory and
+    external processes before it starts, and waits in FIFO order while the budget
+    is used up, so load beyond the machine's capacity queues instead of thrashing.
+    Budgets are sized from the cores and memory available, or from
+    GOVERNOR_CPU_SLOTS / GOVERNOR_MEMORY_MB / GOVERNOR_PROCESS_SLOTS.
+
+    With a ledger_dir, leases are also recorded in a flock-protected ledger file,
+    which makes the budget machine-wide: batch runs, the job service and single
+    runs on the same box share it. Leases of processes that died are dropped.
+
+    A lease covers everything its thread runs until it is released: acquiring
+    again on a thread that already holds one (an encode that probes its input,
+    say) is a no-op rather than a second wait on the same budget.
+    """
+
+    def __init__(self, cpu_slots=None, memory_mb=None, process_slots=None, ledger_dir=None, poll_seconds=0.1):
+        self.cpu_slots = cpu_slots or int(os.getenv("GOVERNOR_CPU_SLOTS", 0)) or available_cpus()
+        self.memory_mb = memory_mb or int(os.getenv("GOVERNOR_MEMORY_MB", 0)) or int(available_memory_mb() * MEMORY_FRACTION)
+        self.process_slots = process_slots or int(os.getenv("GOVERNOR_PROCESS_SLOTS", 0)) or self.cpu_slots * 2
+        self.poll_seconds = poll_seconds
+        self.ledger_path = None
+        if ledger_dir:
+            try:
+                import fcntl  # noqa: F401 -- POSIX only; without it the budget is per process
+                os.makedirs(ledger_dir, exist_ok=True)
+                self.ledger_path = os.path.join(ledger_dir, "ledger.json")
+            except ImportError:
+                pass
+        self._cond = threading.Condition()
+        self._in_use = [0, 0, 0]
+        self._queue = deque()
+        self._leases = 0
+        self._held = threading.local()
+
+    @property
+    def capacity(self):
+        return (self.cpu_slots, self.memory_mb, self.process_slots)
+
+    def cost(self, kind):
+        # A task bigger than the whole budget is clamped so it can still run alone
+        return tuple(min(need, total) for need, total in zip(TASK_COSTS.get(kind, (1, 100, 1)), self.capacity))
+
+    def _fits(self, cost, in_use):
+        return all(used + need <= total for used, need, total in zip(in_use, cost, self.capacity))
+
+    @contextmanager
+    def _ledger(self):
+        import fcntl
+
+        with open(self.ledger_path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self.ledger_path, encoding="utf-8") as f:
+                        leases = json.load(f)
+                except (OSError, ValueError):
+                    leases = {}
+                leases = {key: lease for key, lease in leases.items() if _pid_alive(lease["pid"])}
+                yield leases
+                tmp_path = self.ledger_path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(leases, f)
+                os.replace(tmp_path, self.ledger_path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _reserve(self, lease_id, kind, cost):
+        if self.ledger_path is None:
+            return True
+        with self._ledger() as leases:
+            in_use = [sum(lease["cost"][i] for lease in leases.values()) for i in range(3)]
+            if not self._fits(cost, in_use):
+                return False
+            leases[lease_id] = {"pid": os.getpid(), "kind": kind, "cost": list(cost), "since": time.time()}
+            return True
+
+    def _unreserve(self, lease_id):
+        if self.ledger_path is not None:
+            with self._ledger() as leases:
+                leases.pop(lease_id, None)
+
+    @contextmanager
+    def acquire(self, kind):
+        cost = self.cost(kind)
+        if not any(cost) or getattr(self._held, "lease", None):
+            yield
+            return
+        with self._cond:
+            self._leases += 1
+            lease_id = f"{os.getpid()}:{threading.get_ident()}:{self._leases}"
+            self._queue.append(lease_id)
+            # FIFO within the process: only the head of the queue may take resources
+            while not (self._queue[0] == lease_id and self._fits(cost, self._in_use)
+                       and self._reserve(lease_id, kind, cost)):
+                self._cond.wait(self.poll_seconds if self.ledger_path else None)
+            self._queue.popleft()
+            self._in_use = [used + need for used, need in zip(self._in_use, cost)]
+            self._cond.notify_all()
+        self._held.lease = lease_id
+        try:
+            yield
+        finally:
+            self._held.lease = None
+            with self._cond:
+                self._in_use = [used - need for used, need in zip(self._in_use, cost)]
+                self._unreserve(lease_id)
+                self._cond.notify_all()
+
+_default_governor = None
+_default_governor_lock = threading.Lock()
+
+def default_governor():
+    """
+    The process's machine-wide governor (ledger in GOVERNOR_DIR), created on first use.
+    """
+    global _default_governor
+    with _default_governor_lock:
+        if _default_governor is None:
+            _default_governor = ResourceGovernor(ledger_dir=GOVERNOR_DIR)
+        return _default_governor
+
+
+class Gate:
+    """
+    Context manager for one kind of work: an optional per-stage semaphore, then
+    the governor's budget for the task kind. One Gate can be shared by many
+    threads; each `with` holds its own lease.
+    """
+
+    def __init__(self, semaphore=None, governor=None, kind="encode"):
+        self.semaphore = semaphore or nullcontext()
+        self.governor = governor
+        self.kind = kind
+        self._local = threading.local()
+
+    def __enter__(self):
+        self.semaphore.__enter__()
+        lease = self.governor.acquire(self.kind) if self.governor else nullcontext()
+        try:
+            lease.__enter__()
+        except BaseException:
+            self.semaphore.__exit__(None, None, None)
+            raise
+        self._local.__dict__.setdefault("leases", []).append(lease)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self._local.leases.pop().__exit__(exc_type, exc, tb)
+        finally:
+            self.semaphore.__exit__(exc_type, exc, tb)
+        return False
+
+
+class StageLimits:
+    """
+    Concurrency limits per pipeline stage, shared by every document in a process.
+
+    - llm: concurrent chat completion calls on the heavy lane (slide decks, outline)
+    - llm_light: concurrent calls on the light lane (summaries, translation, repairs),
+      kept separate so short calls never queue behind long deck generations
+    - tts: concurrent edge-tts syntheses
+    - render: concurrent CPU-bound work (LibreOffice, pdf2image, segment encodes)
+
+    A limit of None means unbounded, which is what a single run uses. With a
+    governor, every stage also acquires its task cost from it (see gate()), which
+    is what keeps concurrent documents and processes from oversubscribing the box.
+    """
+
+    def __init__(self, llm=None, tts=None, render=None, soffice_pool=None, governor=None, llm_light=None):
+        self.governor = governor
+        self._semaphores = {
+            "llm": threading.BoundedSemaphore(llm) if llm else None,
+            "llm_light": threading.BoundedSemaphore(llm_light) if llm_light else None,
+            "tts": threading.BoundedSemaphore(tts) if tts else None,
+            "render": threading.BoundedSemaphore(render) if render else None,
+        }
+        self.llm = self.gate("llm")
+        self.llm_light = self.gate("llm_light")
+        self.tts = self.gate("tts")
+        self.render = self.gate("encode")
+        self.soffice_pool = soffice_pool
+
+    def lane(self, name):
+        """
+        The LLM gate for a routing lane ("heavy" or "light", see routing.RoutePolicy).
+        """
+        return self.llm_light if name == "light" else self.llm
+
+    def gate(self, kind):
+        """
+        Gate for a TASK_COSTS kind; CPU-bound kinds share the render semaphore.
+        """
+        semaphore = self._semaphores[kind] if kind in self._semaphores else self._semaphores["render"]
+        return Gate(semaphore, self.governor, kind)
+
+    @contextmanager
+    def soffice_profile(self):
+        """
+        A profile from the shared pool, or without one a throwaway profile (never
+        LibreOffice's default, which another process may be using).
+        """
+        if self.soffice_pool is not None:
+            with self.soffice_pool.profile() as profile:
+                yield profile
+            return
+        with SofficePool(1) as pool, pool.profile() as profile:
+            yield profile
+
+
+class SofficePool:
+    """
+    Pool of LibreOffice user profiles.
+
+    soffice refuses to run twice against the same profile directory (a second
+    instance's --convert-to exits 0 without writing anything), so concurrent
+    conversions each check out their own profile. Profiles are reused across
+    documents, which keeps LibreOffice's first-start initialisation to once per slot.
+    Without a root, the profiles live in a fresh temp directory of this pool's own,
+    removed by close(), so no two processes or pools ever share one.
+    """
+
+    def __init__(self, size, root=None):
+        self._owns_root = root is None
+        self.root = root or tempfile.mkdtemp(prefix="pdf2video-soffice-")
+        self._profiles = queue.Queue()
+        for i in range(size):
+            path = os.path.join(self.root, f"profile_{i}")
+            os.makedirs(path, exist_ok=True)
+            self._profiles.put(path)
+
+    @contextmanager
+    def profile(self):
+        path = self._profiles.get()
+        try:
+            yield "file://" + os.path.abspath(path)
+        finally:
+            self._profiles.put(path)
+
+    def close(self):
+        if self._owns_root:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -1,174 +1,205 @@
 import os
-import subprocess
-from typing import List, Dict, Optional
-import tempfile
-from PIL import Image, ImageDraw, ImageFont
+import re
 import textwrap
-import json
-import time
-import shutil
-from moviepy.editor import ImageSequenceClip, AudioFileClip, CompositeVideoClip, TextClip, ImageClip, concatenate_videoclips
-from pydantic import BaseModel, Field
+from functools import lru_cache
 
-# Function to create short video clips from the results data
-def process_shorts_from_results(results):
+# Shorts are single 9:16 stills (title header, the slide they were cut from, the
+# short's own text) encoded with the same ffmpeg settings as the main video, so
+# they share its narration cache, slide rasters and encoder limits.
+SHORT_SIZE = (1080, 1920)
+HEADER_HEIGHT = 240
+
+DEFAULT_THEME_COLORS = {
+    "primary": "#1F497D",
+    "secondary": "#4F81BD",
+    "accent": "#C0504D",
+    "background": "#FFFFFF",
+    "text": "#000000"
+}
+
+
+@lru_cache(maxsize=None)
+def load_fonts():
     """
-    Process the results data to create short video clips
+    Title and body fonts, loaded once per process.
     """
-    # Extract short video segments from the results
-    all_segments = []
-    for chunk in results:
-        all_segments.extend(chunk.short_segments)
-    
-    print(f"Found {len(all_segments)} short video segments to process")
-    
-    # Create a directory for our short videos if it doesn't exist
-    os.makedirs("shorts", exist_ok=True)
-    
-    # Process each segment into a short video
-    video_paths = []
-    for i, segment in enumerate(all_segments):
-        video_path = create_short_video(segment, i, results[0].theme_colors)
-        video_paths.append(video_path)
-        print(f"✅ Created short video {i+1}/{len(all_segments)}")
-    
-    return video_paths
+    from PIL import ImageFont
+
+    for name in ("Arial.ttf", "DejaVuSans.ttf"):
+        try:
+            return ImageFont.truetype(name, 60), ImageFont.truetype(name, 40)
+        except IOError:
+            continue
+    # Fallback to default font if no TrueType font is available
+    return ImageFont.load_default(), ImageFont.load_default()
 
-def create_short_video(segment, index, theme_colors):
+def _words(text):
+    return set(re.findall(r"[a-z0-9]{3,}", text.lower()))
+
+def match_slide(segment, slides):
     """
-    Create a single short video for a segment
+    Index of the slide whose title and content share the most words with the
+    short segment, or None when nothing overlaps.
     """
-    # Create temporary directory for this short
-    with tempfile.TemporaryDirectory() as tmpdir:
-        # 1. Generate audio for this segment
-        audio_file = os.path.join(tmpdir, f"audio_{index}.mp3")
-        generate_audio_segment(segment.script, audio_file)
-        
-        # 2. Create frames for the short video
-        frames_dir = os.path.join(tmpdir, "frames")
-        os.makedirs(frames_dir, exist_ok=True)
-        
-        # Generate frames for the short video
-        frames = generate_short_video_frames(segment, frames_dir, theme_colors)
-        
-        # 3. Create the video with the frames and audio
-        output_path = f"shorts/short_video_{index+1}.mp4"
-        create_short_clip(frames, audio_file, output_path, segment.duration)
-        
-        return output_path
-
-def generate_short_video_frames(segment, frames_dir, theme_colors):
+    words = _words(f"{segment.title} {segment.content} {segment.script}")
+    best, best_score = None, 0
+    for i, slide in enumerate(slides):
+        score = len(words & _words(f"{slide.title} {slide.content} {' '.join(slide.key_points)}"))
+        if score > best_score:
+            best, best_score = i, score
+    return best
+
+def plan_shorts(results, slide_imgs=None):
     """
-    Generate frames for a short video
+    One entry per short segment across all chunks: the segment, the theme colours
+    and the already-rendered slide raster it is derived from (if any).
+    slide_imgs follows the main video: title slide, one per slide, final slide.
     """
-    # Number of frames to generate (assuming 30fps)
-    frame_count = int(segment.duration * 30)  # 30 frames per second
-    frame_paths = []
-    
-    # Generate background frames
-    for i in range(frame_count):
-        frame_path = os.path.join(frames_dir, f"frame_{i:04d}.png")
-        
-        # Create a frame with title and content
-        create_frame(
-            title=segment.title,
-            content=segment.content,
-            output_path=frame_path,
-            theme_colors=theme_colors,
-            frame_number=i,
-            total_frames=frame_count
-        )
-        frame_paths.append(frame_path)
-    
-    return frame_paths
-
-def create_frame(title, content, output_path, theme_colors, frame_number, total_frames):
+    slides = [slide for chunk in results for slide in chunk.slides]
+    theme_colors = {**DEFAULT_THEME_COLORS, **((results[0].theme_colors or {}) if results else {})}
+    plan, offset = [], 0
+    for chunk in results:
+        for k, segment in enumerate(chunk.short_segments):
+            slide_index = match_slide(segment, slides)
+            if slide_index is None and chunk.slides:
+                # No shared words: fall back to the slide at the same position in its chunk
+                slide_index = offset + k % len(chunk.slides)
+            slide_image = None
+            if slide_imgs and slide_index is not None and slide_index + 1 < len(slide_imgs):
+                slide_image = slide_imgs[slide_index + 1]
+            plan.append({"index": len(plan), "segment": segment, "theme_colors": theme_colors, "slide_image": slide_image})
+        offset += len(chunk.slides)
+    return plan
+
+def _color(value):
+    return value if value.startswith("#") else f"#{value}"
+
+def compose_short_frame(segment, theme_colors, output_path, slide_image=None):
     """
-    Create a single frame for the short video
+    Render the 9:16 still for a short: a title header, the source slide raster
+    scaled to the frame width, and the short's content text below it.
     """
-    # Create a 9:16 aspect ratio image (1080x1920 for high quality)
-    width, height = 1080, 1920
-    image = Image.new('RGBA', (width, height), theme_colors['background'])
+    from PIL import Image, ImageDraw
+
+    width, height = SHORT_SIZE
+    title_font, content_font = load_fonts()
+    image = Image.new("RGB", (width, height), _color(theme_colors["background"]))
     draw = ImageDraw.Draw(image)
-    
-    # Calculate animation progress (0 to 1)
-    progress = frame_number / total_frames
-    
-    # Define fonts
-    try:
-        title_font = ImageFont.truetype("Arial.ttf", 60)
-        content_font = ImageFont.truetype("Arial.ttf", 40)
-    except IOError:
-        # Fallback to default font if Arial is not available
-        title_font = ImageFont.load_default()
-        content_font = ImageFont.load_default()
-    
-    # Add a colored header background
-    header_height = 200
-    draw.rectangle([(0, 0), (width, header_height)], fill=theme_colors['primary'])
-    
-    # Add title
-    title_wrapped = textwrap.fill(title, width=25)
-    draw.text((width//2, header_height//2), title_wrapped, 
-              font=title_font, fill='white', anchor='mm', align='center')
-    
-    # Add content with animation
-    content_wrapped = textwrap.fill(content, width=35)
-    
-    # Simple fade-in animation
-    if progress < 0.2:
-        # Fade in
-        alpha = int(255 * (progress / 0.2))
-        content_color = theme_colors['text'][:-2] + format(alpha, '02x')
-    else:
-        content_color = theme_colors['text']
-    
-    draw.text((width//2, header_height + 300), content_wrapped, 
-              font=content_font, fill=content_color, anchor='mm', align='center')
-    
-    # Add a decorative element
-    circle_radius = 100 + int(20 * (0.5 - abs(0.5 - progress)) * 2)  # Breathing effect
-    circle_position = (width//2, height - 300)
-    draw.ellipse(
-        [(circle_position[0] - circle_radius, circle_position[1] - circle_radius),
-         (circle_position[0] + circle_radius, circle_position[1] + circle_radius)],
-        fill=theme_colors['accent']
-    )
-    
-    # Save the frame
+
+    # Title header
+    draw.rectangle([(0, 0), (width, HEADER_HEIGHT)], fill=_color(theme_colors["primary"]))
+    draw.multiline_text((width // 2, HEADER_HEIGHT // 2), textwrap.fill(segment.title, width=25),
+                        font=title_font, fill="white", anchor="mm", align="center")
+
+    # The slide this short was derived from, reused from the main video's rasters
+    top = HEADER_HEIGHT + 60
+    if slide_image:
+        with Image.open(slide_image) as slide:
+            slide = slide.convert("RGB")
+            slide_height = round(slide.height * width / slide.width)
+            image.paste(slide.resize((width, slide_height), Image.LANCZOS), (0, top))
+        top += slide_height + 60
+
+    draw.multiline_text((width // 2, top), textwrap.fill(segment.content, width=35),
+                        font=content_font, fill=_color(theme_colors["text"]), anchor="ma", align="center")
+
+    # Accent bar
+    draw.rectangle([(0, height - 40), (width, height)], fill=_color(theme_colors["accent"]))
     image.save(output_path)
     return output_path
 
-def create_short_clip(frames, audio_file, output_path, duration):
+def render_shorts(results, slide_imgs, output_dir, ckpt=None, limits=None, store=None, burn_subtitles=False):
     """
-    Create a video clip from frames and audio
+    Render every short: narration through the shared TTS cache, one composed
+    frame, and a still-image encode with the main video's encoder settings.
+    Captions from the narration's word timings are written next to each short
+    (and burned in with burn_subtitles). With a checkpoint, finished shorts are
+    skipped on resume.
     """
-    # Create clip from image sequence
-    clip = ImageSequenceClip(frames, fps=30)
-    
-    # Add audio
-    audio = AudioFileClip(audio_file)
-    video = clip.set_audio(audio)
-    
-    # Set the clip duration
-    if video.duration > duration:
-        video = video.subclip(0, duration)
-    
-    # Ensure the output directory exists
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    
-    # Export the final video
-    video.write_videofile(output_path, codec="libx264", audio_codec="aac")
-    
-    return output_path
+    from main_version_4 import synthesize, encode_segment
+    from workers import StageLimits
+    from checkpoint import hash_inputs, hash_file
+    from assembler import probe_duration
+    from tracing import span, file_size
+    from durations import NarrationEstimator
+    from subtitles import load_word_timings, build_cues, write_srt, write_sidecars
+
+    limits = limits or StageLimits()
+    work_dir = ckpt.path("shorts") if ckpt else os.path.join(output_dir, "shorts", "work")
+    os.makedirs(work_dir, exist_ok=True)
+    os.makedirs(os.path.join(output_dir, "shorts"), exist_ok=True)
+
+    # Scripts predicted to run past their segment's duration are flagged before any
+    # TTS happens; their narration is cut at the segment duration
+    estimator = NarrationEstimator(store)
+    video_paths = []
+    for entry in plan_shorts(results, slide_imgs):
+        i, segment = entry["index"], entry["segment"]
+        output_path = os.path.join(output_dir, "shorts", f"short_video_{i + 1}.mp4")
+        short_input = hash_inputs(segment.model_dump(), entry["theme_colors"],
+                                  hash_file(entry["slide_image"]) if entry["slide_image"] else None, burn_subtitles)
+        if ckpt and ckpt.is_complete(f"short:{i}", short_input) and os.path.exists(output_path):
+            video_paths.append(output_path)
+            continue
+
+        predicted = estimator.estimate(segment.script)
+        if predicted > segment.duration:
+            print(f"⚠️ Short {i + 1}: narration predicted at {predicted:.1f}s, cut to {segment.duration:.1f}s")
+        with span("short", index=i, predicted=round(predicted, 2)) as short_span:
+            audio_path = os.path.join(work_dir, f"short_{i}_audio.mp3")
+            frame_path = os.path.join(work_dir, f"short_{i}_frame.png")
+            words_path = os.path.join(work_dir, f"short_{i}_words.json")
+            with limits.tts:
+                generated = synthesize(segment.script, audio_path, store=store, words_path=words_path)
+            narration_seconds = probe_duration(audio_path)
+            if generated:
+                estimator.observe(segment.script, narration_seconds)
+            duration = min(narration_seconds, segment.duration)
+            cues = build_cues(load_word_timings(words_path, segment.script, narration_seconds), end=duration)
+            subtitles_path = write_srt(cues, os.path.join(work_dir, f"short_{i}.srt")) if burn_subtitles else None
+            with limits.render:
+                compose_short_frame(segment, entry["theme_colors"], frame_path, entry["slide_image"])
+                encode_segment(frame_path, audio_path, output_path, store=store, duration=duration,
+                               subtitles_path=subtitles_path)
+            sidecars = write_sidecars(cues, output_path)
+            short_span.set(bytes_out=file_size(output_path))
+        if ckpt:
+            ckpt.save(f"short:{i}", short_input, artifacts=[output_path, *sidecars])
+        video_paths.append(output_path)
+        print(f"✅ Created short video {i + 1}")
+    estimator.save()
+    return video_paths
+
+# Function to create short video clips from the results data
+def process_shorts_from_results(results, output_dir=".", slide_imgs=None, store=None):
+    """
+    Process the results data to create short video clips in <output_dir>/shorts.
+    Pass the main video's slide rasters as slide_imgs to build shorts from them.
+    """
+    print(f"Found {sum(len(chunk.short_segments) for chunk in results)} short video segments to process")
+    return render_shorts(results, slide_imgs, output_dir, store=store)
 
 def main():
-    # Process the shorts from the results
+    import argparse
+    import glob
+    import json
+    from main_version_4 import SlideChunk
+
+    parser = argparse.ArgumentParser(description="Render shorts from a run's chunk results.")
+    parser.add_argument("results", help="chunk_results.json from Output/runs/<run_id>/")
+    parser.add_argument("--output", default="Output")
+    args = parser.parse_args()
+
+    with open(args.results, encoding="utf-8") as f:
+        results = [SlideChunk(**chunk) for chunk in json.load(f)]
+    # Reuse the run's slide rasters when they are next to the results
+    slides_dir = os.path.join(os.path.dirname(args.results), "slides")
+    slide_imgs = sorted(glob.glob(os.path.join(slides_dir, "slide_*.png")),
+                        key=lambda path: int(re.search(r"slide_(\d+)", path).group(1)))
 
-    video_paths = process_shorts_from_results(results_data)
-    
+    video_paths = process_shorts_from_results(results, output_dir=args.output, slide_imgs=slide_imgs)
     print(f"✅ Created {len(video_paths)} short videos.")
-    print("Videos are available in the 'shorts' directory.")
+    print(f"Videos are available in {os.path.join(args.output, 'shorts')}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()